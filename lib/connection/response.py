@@ -19,23 +19,170 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Any, List, Dict
+from typing import Any, AnyStr, List, Dict
+import codecs
+import hashlib
+import threading
 import time
 import httpx
 import requests
 
 from lib.core.settings import (
+    BINARY_CHECK_SIZE,
+    BODY_INTERN_MAX_SIZE,
+    DATACLASS_SLOTS,
     DEFAULT_ENCODING,
     ITER_CHUNK_SIZE,
     MAX_RESPONSE_SIZE,
     UNKNOWN,
 )
 from lib.parse.url import clean_path, parse_path
-from lib.utils.common import get_readable_size, is_binary, replace_from_all_encodings
+from lib.utils.common import get_all_encodings, get_readable_size, is_binary
 
+# Bodies by the digest of their raw bytes and their encoding, with their size
+_interned_bodies: dict[tuple[bytes, str], tuple[bytes | str, int]] = {}
+_interned_size = 0
+_intern_lock = threading.Lock()
 
-@dataclass
+
+def intern_body(value: AnyStr, key: tuple[bytes, str], size: int) -> AnyStr:
+    """Share the storage of identical bodies (soft 404s, templates, ...)
+
+    `key` is the digest computed while the body was read (see
+    BodyReader.getkey()) and `size` its length in bytes.
+    """
+
+    global _interned_size
+
+    if not value or size > BODY_INTERN_MAX_SIZE:
+        return value
+
+    with _intern_lock:
+        if entry := _interned_bodies.get(key):
+            return entry[0]
+
+        _interned_bodies[key] = (value, size)
+        _interned_size += size
+
+        # Evict the oldest bodies
+        while _interned_size > BODY_INTERN_MAX_SIZE:
+            _interned_size -= _interned_bodies.pop(next(iter(_interned_bodies)))[1]
+
+    return value
+
+
+class BodyReader:
+    """Accumulate a streamed response body
+
+    Once the body is known not to be binary, the remaining chunks are
+    decoded as they arrive and only the decoded content is kept.
+    """
+
+    def __init__(self, headers: Dict[str, str], encoding: str = DEFAULT_ENCODING) -> None:
+        self.length = 0
+        self.binary = False
+        self._encoding = encoding
+        self._binary_checked = False
+        self._sized = "content-length" in headers
+        self._chunks: list[bytes] = []
+        self._buffer: bytearray | None = None
+        self._decoder: codecs.IncrementalDecoder | None = None
+        self._text: list[str] = []
+        self._digest = hashlib.blake2b(digest_size=16)
+
+        try:
+            content_length = int(headers.get("content-length", 0))
+        except ValueError:
+            content_length = 0
+
+        # Allocate the whole body at once when the size is known
+        if 0 < content_length <= MAX_RESPONSE_SIZE:
+            self._buffer = bytearray(content_length)
+
+    def feed(self, chunk: bytes) -> bool:
+        """Store a chunk, return True if the download should stop"""
+
+        self._digest.update(chunk)
+
+        if self._decoder is not None:
+            self._text.append(self._decoder.decode(chunk))
+        elif self._buffer is not None:
+            # Slice assignment grows the buffer if the decoded body is
+            # larger than Content-Length (compressed responses)
+            self._buffer[self.length:self.length + len(chunk)] = chunk
+        else:
+            self._chunks.append(chunk)
+
+        self.length += len(chunk)
+
+        # Only the head of the body is inspected, and only once
+        if not self._binary_checked and self.length >= BINARY_CHECK_SIZE:
+            self._check_binary()
+
+        return self.length >= MAX_RESPONSE_SIZE or (self._sized and self.binary)
+
+    def _check_binary(self) -> None:
+        # Slicing copies at most BINARY_CHECK_SIZE bytes. A memoryview would
+        # avoid it, but bytes.translate() (used by is_binary()) isn't
+        # available on views, and a regex search over one is far slower
+        # than that copy
+        if self._buffer is not None:
+            head = self._buffer[:min(self.length, BINARY_CHECK_SIZE)]
+        elif self._chunks and len(self._chunks[0]) >= BINARY_CHECK_SIZE:
+            head = self._chunks[0][:BINARY_CHECK_SIZE]
+        else:
+            head = b"".join(self._chunks)[:BINARY_CHECK_SIZE]
+
+        self.binary = is_binary(head)
+        self._binary_checked = True
+
+        if not self.binary:
+            try:
+                decoder = codecs.getincrementaldecoder(self._encoding)
+            except LookupError:
+                decoder = codecs.getincrementaldecoder(DEFAULT_ENCODING)
+
+            # Decode what has been received so far and drop the raw bytes
+            self._decoder = decoder(errors="ignore")
+            self._text.append(self._decoder.decode(self._getbytes()))
+            self._buffer = None
+            self._chunks = []
+
+    def _getbytes(self) -> bytes:
+        if self._buffer is not None:
+            del self._buffer[self.length:]
+            return bytes(self._buffer)
+
+        return b"".join(self._chunks)
+
+    def getvalue(self) -> tuple[bytes, str]:
+        """Return the raw body of a binary response and the content of a text one"""
+
+        if not self._binary_checked:
+            self._check_binary()
+
+        if self._decoder is not None:
+            self._text.append(self._decoder.decode(b"", final=True))
+            return b"", "".join(self._text)
+
+        return self._getbytes(), ""
+
+    def getkey(self) -> tuple[bytes, str]:
+        """Identify the body by the digest of the bytes read and their encoding"""
+
+        return self._digest.digest(), self._encoding
+
+
+@dataclass(**DATACLASS_SLOTS)
 class BaseResponse:
+    """A response with its body read
+
+    Only one of `body` and `content` is set: `body` holds the raw bytes of
+    binary responses and `content` the decoded text of the others (`body`
+    is then empty). The body length in bytes is stored by the subclasses
+    from what was actually read.
+    """
+
     url: str
     status: int
     headers: Dict[str, str]
@@ -43,15 +190,25 @@ class BaseResponse:
     history: List[str] = field(default_factory=list)
     content: str = ""
     body: bytes = b""
-    datetime: str = field(init=False)
+    timestamp: float = field(init=False)
     full_path: str = field(init=False)
     path: str = field(init=False)
+    _length: int = field(default=0, init=False, repr=False, compare=False)
+    _hash: int | None = field(default=None, init=False, repr=False, compare=False)
+    # Memoized by WAF.analyze()
+    waf_result: dict | None = field(default=None, init=False, repr=False, compare=False)
 
     def __post_init__(self):
-        self.datetime = time.strftime("%Y-%m-%d %H:%M:%S")
+        self._length = len(self.body)
+        self.timestamp = time.time()
         self.full_path = parse_path(self.url)
         self.path = clean_path(self.full_path)
 
+    @property
+    def datetime(self) -> str:
+        # Only formatted for responses that get printed or reported
+        return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.timestamp))
+
     @property
     def type(self) -> str:
         if ct := self.headers.get("content-type"):
@@ -64,7 +221,7 @@ class BaseResponse:
         if cl := self.headers.get("content-length"):
             return int(cl)
 
-        return len(self.body)
+        return self._length
 
     @property
     def size(self) -> str:
@@ -73,20 +230,39 @@ class BaseResponse:
     def __hash__(self) -> int:
         # Hash the static parts of the response only.
         # See https://github.com/maurosoria/dirsearch/pull/1436#issuecomment-2476390956
-        body = replace_from_all_encodings(self.content, self.full_path.split("#")[0], "") if self.content else self.body
-        return hash((self.status, body))
+        # The body doesn't change after the response is built, so the hash is
+        # computed only once
+        if self._hash is None:
+            body = self.body
+
+            # Strip the reflected path from text bodies
+            if self.content:
+                content = self.content
+                for encoded in get_all_encodings(self.full_path.split("#")[0]):
+                    if encoded and encoded in content:
+                        content = content.replace(encoded, "")
+
+                body = content.encode(DEFAULT_ENCODING)
+
+            digest = hashlib.blake2b(body, digest_size=16).digest()
+            self._hash = hash((self.status, digest))
+
+        return self._hash
 
     def __eq__(self, other: Any) -> bool:
         if not isinstance(other, BaseResponse):
             return False
-        return (self.status, self.body, self.redirect) == (
+        return (self.status, self.body, self.content, self.redirect) == (
             other.status,
             other.body,
+            other.content,
             other.redirect,
         )
 
 
 class Response(BaseResponse):
+    __slots__ = ()
+
     def __init__(self, url: str, response: requests.Response) -> None:
         super().__init__(
             url=url,
@@ -96,24 +272,22 @@ class Response(BaseResponse):
             history=[str(res.url) for res in response.history]
         )
 
-        for chunk in response.iter_content(chunk_size=ITER_CHUNK_SIZE):
-            self.body += chunk
+        reader = BodyReader(self.headers, response.encoding or DEFAULT_ENCODING)
 
-            if len(self.body) >= MAX_RESPONSE_SIZE or (
-                "content-length" in self.headers and is_binary(self.body)
-            ):
+        for chunk in response.iter_content(chunk_size=ITER_CHUNK_SIZE):
+            if reader.feed(chunk):
                 break
 
-        if not is_binary(self.body):
-            try:
-                self.content = self.body.decode(
-                    response.encoding or DEFAULT_ENCODING, errors="ignore"
-                )
-            except LookupError:
-                self.content = self.body.decode(DEFAULT_ENCODING, errors="ignore")
+        body, content = reader.getvalue()
+        key = reader.getkey()
+        self.body = intern_body(body, key, reader.length)
+        self.content = intern_body(content, key, reader.length)
+        self._length = reader.length
 
 
 class AsyncResponse(BaseResponse):
+    __slots__ = ()
+
     @classmethod
     async def create(cls, url: str, response: httpx.Response) -> AsyncResponse:
         instance = cls(
@@ -123,21 +297,17 @@ class AsyncResponse(BaseResponse):
             redirect=response.headers.get("location") or "",
             history=[str(res.url) for res in response.history]
         )
-        
-        async for chunk in response.aiter_bytes(chunk_size=ITER_CHUNK_SIZE):
-            instance.body += chunk
 
-            if len(instance.body) >= MAX_RESPONSE_SIZE or (
-                "content-length" in instance.headers and is_binary(instance.body)
-            ):
+        reader = BodyReader(instance.headers, response.encoding or DEFAULT_ENCODING)
+
+        async for chunk in response.aiter_bytes(chunk_size=ITER_CHUNK_SIZE):
+            if reader.feed(chunk):
                 break
 
-        if not is_binary(instance.body):
-            try:
-                instance.content = instance.body.decode(
-                    response.encoding or DEFAULT_ENCODING, errors="ignore"
-                )
-            except LookupError:
-                instance.content = instance.body.decode(DEFAULT_ENCODING, errors="ignore")
+        body, content = reader.getvalue()
+        key = reader.getkey()
+        instance.body = intern_body(body, key, reader.length)
+        instance.content = intern_body(content, key, reader.length)
+        instance._length = reader.length
 
         return instance
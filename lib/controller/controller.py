@@ -276,6 +276,8 @@ class Controller:
                     interface.warning(msg)
 
                 self.fuzzer.set_base_path(current_directory)
+                # The fuzzer prints its own messages when it starts
+                interface.flush()
                 if options.async_mode:
                     # use a future to get exceptions from handle_pause
                     # https://stackoverflow.com/a/64230941
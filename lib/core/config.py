@@ -1,8 +1,12 @@
 # -*- coding: utf-8 -*-
-from dataclasses import dataclass, field
-from typing import Any, List, Set, Dict, Tuple, Optional
+from dataclasses import dataclass, field, fields
+from typing import AbstractSet, Any, List, Dict, Sequence, Tuple, Optional
 
-@dataclass
+from lib.core.settings import DATACLASS_SLOTS
+
+# Options that are only read after parsing share immutable defaults,
+# containers that get mutated during the scan keep their own instance
+@dataclass(**DATACLASS_SLOTS)
 class Config:
     urls: List[str] = field(default_factory=list)
     urls_file: Optional[str] = None
@@ -27,19 +31,19 @@ class Config:
     deep_recursive: bool = False
     force_recursive: bool = False
     recursion_depth: int = 0
-    recursion_status_codes: Set[int] = field(default_factory=set)
+    recursion_status_codes: AbstractSet[int] = frozenset()
     filter_threshold: int = 0
-    subdirs: List[str] = field(default_factory=list)
-    exclude_subdirs: List[str] = field(default_factory=list)
-    include_status_codes: Set[int] = field(default_factory=set)
-    exclude_status_codes: Set[int] = field(default_factory=set)
-    exclude_sizes: Set[str] = field(default_factory=set)
+    subdirs: Sequence[str] = ()
+    exclude_subdirs: Sequence[str] = ()
+    include_status_codes: AbstractSet[int] = frozenset()
+    exclude_status_codes: AbstractSet[int] = frozenset()
+    exclude_sizes: AbstractSet[str] = frozenset()
     exclude_texts: Optional[List[str]] = None
     exclude_regex: Optional[str] = None
     exclude_redirect: Optional[str] = None
     exclude_response: Optional[str] = None
     no_wildcard: bool = False
-    skip_on_status: Set[int] = field(default_factory=set)
+    skip_on_status: AbstractSet[int] = frozenset()
     minimum_response_size: int = 0
     maximum_response_size: int = 0
     max_time: int = 0
@@ -51,6 +55,7 @@ class Config:
     headers: Dict[str, str] = field(default_factory=dict)
     headers_file: Optional[str] = None
     follow_redirects: bool = False
+    bypass_waf: bool = False
     random_agents: bool = False
     auth: Optional[str] = None
     auth_type: Optional[str] = None
@@ -91,5 +96,8 @@ class Config:
 
     def update(self, new_options: Dict[str, Any]):
         for key, value in new_options.items():
-            if hasattr(self, key):
+            if key in _FIELD_NAMES:
                 setattr(self, key, value)
+
+
+_FIELD_NAMES = frozenset(f.name for f in fields(Config))
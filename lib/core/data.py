@@ -18,10 +18,9 @@
 
 from __future__ import annotations
 
-from typing import Any
 from lib.core.config import Config
 
-# we can't import `Dictionary` due to a circular import
-blacklists: dict[int, Any] = {}
+# Blacklisted path suffixes per status code
+blacklists: dict[int, tuple[str, ...]] = {}
 # Deprecated: Use Config object instead
 options = Config()
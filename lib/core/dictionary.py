@@ -19,25 +19,50 @@
 from __future__ import annotations
 
 import re
-from typing import Any, Iterator, Generator
+from itertools import islice
+from typing import Any, Callable, Iterator, Generator
 from pathlib import Path
 
 from lib.core.data import options
 from lib.core.decorators import locked
 from lib.core.settings import (
+    DICTIONARY_BATCH_SIZE,
     SCRIPT_PATH,
+    WORDLIST_BATCH_SIZE,
     EXTENSION_TAG,
     EXCLUDE_OVERWRITE_EXTENSIONS,
     EXTENSION_RECOGNITION_REGEX,
+    MULTI_PATTERN_THRESHOLD,
 )
 from lib.parse.url import clean_path
 from lib.utils.common import lstrip_once
 from lib.utils.file import FileUtils
 
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = None
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+try:
+    from xxhash import xxh3_64_intdigest
+
+    def fingerprint(path: str) -> int:
+        return xxh3_64_intdigest(path.encode())
+except ImportError:
+    fingerprint = hash
+
+_EXT_RECOGNITION_COMPILED = re.compile(EXTENSION_RECOGNITION_REGEX)
+
 
 # Get ignore paths for status codes.
 # Reference: https://github.com/maurosoria/dirsearch#Blacklist
-def get_blacklists() -> dict[int, Dictionary]:
+def get_blacklists() -> dict[int, tuple[str, ...]]:
     blacklists = {}
 
     for status in [400, 403, 500]:
@@ -50,9 +75,11 @@ def get_blacklists() -> dict[int, Dictionary]:
             # Skip if cannot read file
             continue
 
-        blacklists[status] = Dictionary(
-            files=[blacklist_file_name],
-            is_blacklist=True,
+        # Blacklists are matched against every response, so keep them as
+        # suffixes ready for str.endswith() instead of a one-shot generator
+        blacklists[status] = tuple(
+            lstrip_once(suffix, "/")
+            for suffix in Dictionary(files=[blacklist_file_name], is_blacklist=True)
         )
 
     return blacklists
@@ -66,17 +93,13 @@ class Dictionary:
         self._extra = []
         self._extra_index = 0
         self._re_ext_tag = re.compile(EXTENSION_TAG, re.IGNORECASE)
+        self.compile_exclude_extensions()
         self._count = 0
-        
+
         # Pre-calculate length if possible (approximate)
         if not is_blacklist:
             for file in files:
-                try:
-                    with open(file, 'r', encoding='utf-8', errors='ignore') as f:
-                        for _ in f:
-                            self._count += 1
-                except Exception:
-                    pass
+                self._count += FileUtils.count_lines(file)
 
     @property
     def index(self) -> int:
@@ -88,9 +111,29 @@ class Dictionary:
         if len(self._extra) > self._extra_index:
             self._extra_index += 1
             return self._extra[self._extra_index - 1]
-        
+
         return next(self._generator)
 
+    @locked
+    def next_batch(self, size: int = DICTIONARY_BATCH_SIZE) -> list[str]:
+        """Get up to `size` paths at once, raise StopIteration when exhausted"""
+
+        batch = self._extra[self._extra_index:self._extra_index + size]
+        self._extra_index += len(batch)
+        batch.extend(islice(self._generator, size - len(batch)))
+
+        if not batch:
+            raise StopIteration
+
+        return batch
+
+    @locked
+    def put_back(self, paths: list[str]) -> None:
+        """Give back paths taken with next_batch() but not scanned, they
+        are the next ones returned"""
+
+        self._extra[self._extra_index:self._extra_index] = paths
+
     def __iter__(self) -> Iterator[str]:
         return self
 
@@ -98,16 +141,19 @@ class Dictionary:
         return self._count
 
     def process_line(self, line: str) -> Generator[str, None, None]:
-        # Removing leading "/" to work with prefixes later
-        line = lstrip_once(line.strip(), "/")
-
+        # Lines come from read_lines() already cleaned up
         if not self.is_valid(line):
             return
 
+        extensions = options.extensions
+
         # Classic dirsearch wordlist processing (with %EXT% keyword)
-        if EXTENSION_TAG in line.lower():
-            for extension in options.extensions:
-                yield self._re_ext_tag.sub(extension, line)
+        # (only lines containing "%" need to be lowercased for the check)
+        if "%" in line and EXTENSION_TAG in line.lower():
+            # Normalize the tag case once, then use plain string replacement
+            line = self._re_ext_tag.sub(EXTENSION_TAG, line)
+            for extension in extensions:
+                yield line.replace(EXTENSION_TAG, extension)
         else:
             yield line
 
@@ -125,21 +171,21 @@ class Dictionary:
             ):
                 yield line + "/"
 
-                for extension in options.extensions:
+                for extension in extensions:
                     yield f"{line}.{extension}"
             # Overwrite unknown extensions with selected ones (but also keep the origin)
             elif (
                 options.overwrite_extensions
-                and not line.endswith(options.extensions + EXCLUDE_OVERWRITE_EXTENSIONS)
+                and not line.endswith(extensions + EXCLUDE_OVERWRITE_EXTENSIONS)
                 # Paths that have queries in wordlist are usually used for exploiting
                 # disclosed vulnerabilities of services, skip such paths
                 and "?" not in line
                 and "#" not in line
-                and re.search(EXTENSION_RECOGNITION_REGEX, line)
+                and _EXT_RECOGNITION_COMPILED.search(line)
             ):
                 base = line.split(".")[0]
 
-                for extension in options.extensions:
+                for extension in extensions:
                     yield f"{base}.{extension}"
 
     def apply_transformations(self, path: str) -> Generator[str, None, None]:
@@ -147,87 +193,168 @@ class Dictionary:
             yield path
             return
 
+        prefixes = options.prefixes
+        suffixes = options.suffixes
+        # If prefixes/suffixes apply, only the transformed paths are yielded,
+        # otherwise the path itself
+        transformed = False
+
         # Prefixes
-        if options.prefixes:
-            for pref in options.prefixes:
+        if prefixes:
+            for pref in prefixes:
                 if not path.startswith(("/", pref)):
+                    transformed = True
                     yield pref + path
-        
+
         # Suffixes
-        if options.suffixes:
-            for suff in options.suffixes:
-                if (
-                    not path.endswith(("/", suff))
-                    and "?" not in path
-                    and "#" not in path
-                ):
+        if suffixes and "?" not in path and "#" not in path:
+            for suff in suffixes:
+                if not path.endswith(("/", suff)):
+                    transformed = True
                     yield path + suff
-        
-        # Original path (if no prefixes/suffixes or in addition to them depending on logic)
-        # The original logic replaced the list with altered_wordlist if it existed.
-        # Here we yield the transformed versions. If prefixes/suffixes are set, 
-        # the original logic implies ONLY transformed versions are yielded if altered_wordlist is not empty.
-        # However, usually users want both or just the transformed. 
-        # Following original logic: if prefixes/suffixes exist, we yield those.
-        # If not, we yield the path itself.
-        
-        has_transformations = False
-        if options.prefixes:
-             for pref in options.prefixes:
-                if not path.startswith(("/", pref)):
-                    has_transformations = True
-        
-        if options.suffixes:
-             for suff in options.suffixes:
-                if (
-                    not path.endswith(("/", suff))
-                    and "?" not in path
-                    and "#" not in path
-                ):
-                    has_transformations = True
-
-        if not has_transformations:
+
+        if not transformed:
             yield path
 
-    def apply_case(self, path: str) -> str:
+    @staticmethod
+    def get_case_function() -> Callable[[str], str] | None:
         if options.lowercase:
-            return path.lower()
+            return str.lower
         elif options.uppercase:
-            return path.upper()
+            return str.upper
         elif options.capitalization:
-            return path.capitalize()
-        return path
+            return str.capitalize
+        return None
+
+    @staticmethod
+    def is_plain() -> bool:
+        """Whether wordlist lines are yielded as they are"""
+
+        return not (
+            options.extensions
+            or options.force_extensions
+            or options.overwrite_extensions
+            or options.prefixes
+            or options.suffixes
+            or options.lowercase
+            or options.uppercase
+            or options.capitalization
+        )
 
     def generate(self) -> Generator[str, None, None]:
-        seen = set()
-        
+        # Only 64-bit fingerprints of the emitted paths are kept for the
+        # deduplication, which is much lighter than storing the paths
+        seen: set[int] = set()
+
+        if self.is_plain():
+            yield from self.generate_plain(seen)
+            return
+
+        # Pick the case transformation once instead of for every path
+        apply_case = self.get_case_function()
+
         for dict_file in self._files:
             try:
-                with open(dict_file, "r", encoding="utf-8", errors="replace") as f:
-                    for line in f:
-                        for processed in self.process_line(line):
-                            for transformed in self.apply_transformations(processed):
-                                final = self.apply_case(transformed)
-                                if final not in seen:
-                                    seen.add(final)
-                                    yield final
-                                    
-                                    # Keep memory usage low by clearing seen set periodically if it gets too huge
-                                    # ideally we want to dedup, but for massive lists we might accept some dupes
-                                    # to save RAM. For now, let's keep it simple.
+                for line in self.read_lines(dict_file):
+                    for processed in self.process_line(line):
+                        for transformed in self.apply_transformations(processed):
+                            final = apply_case(transformed) if apply_case else transformed
+                            key = fingerprint(final)
+                            if key not in seen:
+                                seen.add(key)
+                                yield final
             except OSError:
                 continue
 
+    def generate_plain(self, seen: set[int]) -> Generator[str, None, None]:
+        # Without extensions, prefixes, suffixes or case transformation
+        # every valid line maps to itself (or to nothing for %EXT% lines)
+        for dict_file in self._files:
+            try:
+                for line in self.read_lines(dict_file):
+                    if not self.is_valid(line) or (
+                        "%" in line and EXTENSION_TAG in line.lower()
+                    ):
+                        continue
+
+                    key = fingerprint(line)
+                    if key not in seen:
+                        seen.add(key)
+                        yield line
+            except OSError:
+                continue
+
+    @staticmethod
+    def read_lines(file: str) -> Iterator[str]:
+        """Yield the stripped lines of a wordlist, without the leading "/"
+        (to work with prefixes later), skipping blank lines and comments"""
+
+        if pa is None:
+            # Comments and slashes are ASCII, so lines are only
+            # decoded once they are known to be kept
+            with open(file, "rb") as fd:
+                for line in fd:
+                    line = line.strip()
+                    if not line or line[:1] == b"#":
+                        continue
+                    if line[:1] == b"/":
+                        line = line[1:]
+
+                    yield line.decode("utf-8", "replace")
+            return
+
+        # If PyArrow is available, clean the lines up with vectorized
+        # kernels, one batch at a time
+        with open(file, "r", encoding="utf-8", errors="replace") as fd:
+            while lines := fd.readlines(WORDLIST_BATCH_SIZE):
+                array = pc.utf8_trim_whitespace(pa.array(lines, pa.string()))
+                array = array.filter(
+                    pc.and_(
+                        pc.not_equal(array, ""),
+                        pc.invert(pc.starts_with(array, pattern="#")),
+                    )
+                )
+                array = pc.replace_substring_regex(
+                    array, pattern="^/", replacement="", max_replacements=1
+                )
+                yield from array.to_pylist()
+
+    def compile_exclude_extensions(self) -> None:
+        self._exclude_ext_suffixes = tuple(
+            f".{extension}" for extension in options.exclude_extensions
+        )
+        self._exclude_ext_automaton = None
+
+        # Match long exclusion lists in a single scan of the path tail
+        if ahocorasick and len(self._exclude_ext_suffixes) > MULTI_PATTERN_THRESHOLD:
+            automaton = ahocorasick.Automaton()
+            for suffix in self._exclude_ext_suffixes:
+                automaton.add_word(suffix, suffix)
+            automaton.make_automaton()
+
+            self._exclude_ext_automaton = automaton
+            self._exclude_ext_max_length = max(map(len, self._exclude_ext_suffixes))
+
+    def has_excluded_extension(self, path: str) -> bool:
+        if self._exclude_ext_automaton is None:
+            return path.endswith(self._exclude_ext_suffixes)
+
+        end = len(path) - 1
+        for end_index, _ in self._exclude_ext_automaton.iter(
+            path, max(0, len(path) - self._exclude_ext_max_length)
+        ):
+            if end_index == end:
+                return True
+
+        return False
+
     def is_valid(self, path: str) -> bool:
         # Skip comments and empty lines
         if not path or path.startswith("#"):
             return False
 
         # Skip if the path has excluded extensions
-        cleaned_path = clean_path(path)
-        if cleaned_path.endswith(
-            tuple(f".{extension}" for extension in options.exclude_extensions)
-        ):
+        if self.has_excluded_extension(clean_path(path)):
             return False
 
         return True
@@ -238,6 +365,7 @@ class Dictionary:
         self._extra.append(path)
 
     def reset(self) -> None:
+        self.compile_exclude_extensions()
         self._generator = self.generate()
         self._extra_index = 0
         self._extra.clear()
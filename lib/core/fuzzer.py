@@ -20,10 +20,11 @@ from __future__ import annotations
 
 import asyncio
 import re
+from collections import defaultdict
+from itertools import chain, count
 import threading
 import time
-from concurrent.futures import ThreadPoolExecutor
-from typing import Any, Callable, Generator
+from typing import Any, Callable, Generator, Iterable
 
 from lib.connection.requester import AsyncRequester, BaseRequester, Requester
 from lib.connection.response import BaseResponse
@@ -35,11 +36,21 @@ from lib.core.scanner import AsyncScanner, BaseScanner, Scanner
 from lib.core.settings import (
     DEFAULT_TEST_PREFIXES,
     DEFAULT_TEST_SUFFIXES,
+    DICTIONARY_BATCH_SIZE,
+    MULTI_PATTERN_THRESHOLD,
+    SCANNER_TRIE_THRESHOLD,
+    WAF_CHECK_BUDGET,
     WILDCARD_TEST_POINT_MARKER,
 )
 from lib.core.waf import WAF
 from lib.parse.url import clean_path
-from lib.utils.common import get_readable_size, lstrip_once
+from lib.utils.common import get_readable_size_range
+from lib.utils.prefilter import build_prefilter
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
 
 
 class BaseFuzzer:
@@ -55,32 +66,139 @@ class BaseFuzzer:
         self._requester = requester
         self._dictionary = dictionary
         self._base_path: str = ""
-        self._hashes: dict = {}
+        self._hashes: defaultdict[int, int] = defaultdict(int)
         self.match_callbacks = match_callbacks
         self.not_found_callbacks = not_found_callbacks
         self.error_callbacks = error_callbacks
         self.waf_detected = False
+        self._delay = options.delay
+        # Filters read for every response
+        self._exclude_status_codes = options.exclude_status_codes
+        self._include_status_codes = options.include_status_codes
+        self._minimum_response_size = options.minimum_response_size
+        self._maximum_response_size = options.maximum_response_size
+        self._filter_threshold = options.filter_threshold
+        self._exclude_texts = options.exclude_texts
+        self._exclude_redirect = options.exclude_redirect
+        # Detection is only reported once, and a WAF shows up in the first
+        # responses if there is one, so only a limited number is checked.
+        # next() on an itertools.count is atomic, threads can't go over it
+        self._waf_checks = count()
+        # Compile the filter patterns once instead of on every response
+        self._exclude_regex = (
+            re.compile(options.exclude_regex) if options.exclude_regex else None
+        )
+        self._exclude_regex_prefilter = (
+            build_prefilter([options.exclude_regex]) if options.exclude_regex else None
+        )
+        try:
+            self._exclude_redirect_regex = (
+                re.compile(options.exclude_redirect) if options.exclude_redirect else None
+            )
+        except re.error:
+            # Not a valid regex, only matched as a substring
+            self._exclude_redirect_regex = None
+        self._exclude_texts_automaton = self.build_texts_automaton(options.exclude_texts)
+        # Compare lengths instead of formatting every length as a readable size
+        self._exclude_size_ranges = tuple(
+            filter(None, map(get_readable_size_range, options.exclude_sizes))
+        )
 
         self.scanners: dict[str, dict[str, Scanner]] = {
             "default": {},
             "prefixes": {},
             "suffixes": {},
         }
+        self._prefix_trie: dict | None = None
+        self._suffix_trie: dict | None = None
+
+    @staticmethod
+    def build_texts_automaton(texts: list[str] | None) -> Any:
+        """Build an automaton to look for all the texts in a single pass"""
+
+        if not (
+            ahocorasick
+            and texts
+            and len(texts) > MULTI_PATTERN_THRESHOLD
+            and all(texts)
+        ):
+            return None
+
+        automaton = ahocorasick.Automaton()
+        for text in texts:
+            automaton.add_word(text, text)
+        automaton.make_automaton()
+
+        return automaton
+
+    def has_excluded_text(self, content: str) -> bool:
+        if self._exclude_texts_automaton is not None:
+            return next(self._exclude_texts_automaton.iter(content), None) is not None
+
+        return any(text in content for text in self._exclude_texts)
+
+    def get_batch_size(self) -> int:
+        # Small enough that short wordlists are still spread over all workers
+        return max(
+            1, min(DICTIONARY_BATCH_SIZE, len(self._dictionary) // (options.thread_count * 4))
+        )
 
     def set_base_path(self, path: str) -> None:
         self._base_path = path
 
+    @staticmethod
+    def build_trie(scanners: dict[str, BaseScanner], reverse: bool = False) -> dict:
+        # Every node maps a character to the next node, the scanner of
+        # a complete key is stored under None
+        trie: dict = {}
+
+        for key, scanner in scanners.items():
+            node = trie
+            for char in reversed(key) if reverse else key:
+                node = node.setdefault(char, {})
+            node[None] = scanner
+
+        return trie
+
+    @staticmethod
+    def walk_trie(trie: dict, chars: Iterable[str]) -> Generator[BaseScanner, None, None]:
+        node = trie
+
+        for char in chars:
+            if None in node:
+                yield node[None]
+            if not (node := node.get(char)):
+                return
+
+        if None in node:
+            yield node[None]
+
+    def setup_tries(self) -> None:
+        # Looking up many prefixes/suffixes costs the length of the path
+        # instead of the number of scanners
+        scanner_count = len(self.scanners["prefixes"]) + len(self.scanners["suffixes"])
+
+        if scanner_count > SCANNER_TRIE_THRESHOLD:
+            self._prefix_trie = self.build_trie(self.scanners["prefixes"])
+            self._suffix_trie = self.build_trie(self.scanners["suffixes"], reverse=True)
+        else:
+            self._prefix_trie = self._suffix_trie = None
+
     def get_scanners_for(self, path: str) -> Generator[BaseScanner, None, None]:
         # Clean the path, so can check for extensions/suffixes
         path = clean_path(path)
 
-        for prefix in self.scanners["prefixes"]:
-            if path.startswith(prefix):
-                yield self.scanners["prefixes"][prefix]
+        if self._prefix_trie is not None:
+            yield from self.walk_trie(self._prefix_trie, path)
+            yield from self.walk_trie(self._suffix_trie, reversed(path))
+        else:
+            for prefix in self.scanners["prefixes"]:
+                if path.startswith(prefix):
+                    yield self.scanners["prefixes"][prefix]
 
-        for suffix in self.scanners["suffixes"]:
-            if path.endswith(suffix):
-                yield self.scanners["suffixes"][suffix]
+            for suffix in self.scanners["suffixes"]:
+                if path.endswith(suffix):
+                    yield self.scanners["suffixes"][suffix]
 
         for scanner in self.scanners["default"].values():
             yield scanner
@@ -88,51 +206,61 @@ class BaseFuzzer:
     def is_excluded(self, resp: BaseResponse) -> bool:
         """Validate the response by different filters"""
 
-        if resp.status in options.exclude_status_codes:
+        # Cheap checks go first, body scans last
+        if resp.status in self._exclude_status_codes:
             return True
 
         if (
-            options.include_status_codes
-            and resp.status not in options.include_status_codes
+            self._include_status_codes
+            and resp.status not in self._include_status_codes
         ):
             return True
 
-        if (
-            resp.status in blacklists
-            and any(
-                resp.path.endswith(lstrip_once(suffix, "/"))
-                for suffix in blacklists.get(resp.status)
-            )
-        ):
-            return True
+        # The length property parses the Content-Length header
+        length = resp.length
 
-        if get_readable_size(resp.length).rstrip() in options.exclude_sizes:
+        if length < self._minimum_response_size:
             return True
 
-        if resp.length < options.minimum_response_size:
+        if length > self._maximum_response_size > 0:
             return True
 
-        if resp.length > options.maximum_response_size > 0:
+        if self._exclude_size_ranges and any(
+            start <= length < end for start, end in self._exclude_size_ranges
+        ):
             return True
 
-        if options.exclude_texts and any(text in resp.content for text in options.exclude_texts):
+        if (
+            self._filter_threshold
+            and self._hashes.get(hash(resp), 0) >= self._filter_threshold
+        ):
             return True
 
-        if options.exclude_regex and re.search(options.exclude_regex, resp.content):
+        if self._exclude_texts and self.has_excluded_text(resp.content):
             return True
 
         if (
-            options.exclude_redirect
+            self._exclude_regex
             and (
-                options.exclude_redirect in resp.redirect
-                or re.search(options.exclude_redirect, resp.redirect)
+                self._exclude_regex_prefilter is None
+                or self._exclude_regex_prefilter.scan(resp.content)
             )
+            and self._exclude_regex.search(resp.content)
         ):
             return True
 
+        if resp.status in blacklists and resp.path.endswith(blacklists[resp.status]):
+            return True
+
         if (
-            options.filter_threshold
-            and self._hashes.get(hash(resp), 0) >= options.filter_threshold
+            self._exclude_redirect
+            and (
+                self._exclude_redirect in resp.redirect
+                or (
+                    self._exclude_redirect_regex is not None
+                    and self._exclude_redirect_regex.search(resp.redirect)
+                )
+            )
         ):
             return True
 
@@ -160,7 +288,7 @@ class Fuzzer(BaseFuzzer):
         self._play_event = threading.Event()
         self._quit_event = threading.Event()
         self._pause_semaphore = threading.Semaphore(0)
-        self._executor = None
+        self._threads: list[threading.Thread] = []
 
     def setup_scanners(self) -> None:
         # Default scanners (wildcard testers)
@@ -192,7 +320,7 @@ class Fuzzer(BaseFuzzer):
                 self._requester, tested=self.scanners, path=options.exclude_response
             )
 
-        for prefix in set(options.prefixes + DEFAULT_TEST_PREFIXES):
+        for prefix in frozenset(chain(options.prefixes, DEFAULT_TEST_PREFIXES)):
             self.scanners["prefixes"][prefix] = Scanner(
                 self._requester,
                 tested=self.scanners,
@@ -200,7 +328,7 @@ class Fuzzer(BaseFuzzer):
                 context=f"/{self._base_path}{prefix}***",
             )
 
-        for suffix in set(options.suffixes + DEFAULT_TEST_SUFFIXES):
+        for suffix in frozenset(chain(options.suffixes, DEFAULT_TEST_SUFFIXES)):
             self.scanners["suffixes"][suffix] = Scanner(
                 self._requester,
                 tested=self.scanners,
@@ -217,116 +345,139 @@ class Fuzzer(BaseFuzzer):
                     context=f"/{self._base_path}***.{extension}",
                 )
 
+        self.setup_tries()
+
+    def setup_threads(self) -> None:
+        self._threads = [
+            threading.Thread(target=self.thread_proc, daemon=True)
+            for _ in range(options.thread_count)
+        ]
+
     def start(self) -> None:
         self.setup_scanners()
+        self.setup_threads()
         self.play()
         self._quit_event.clear()
-        
-        self._executor = ThreadPoolExecutor(max_workers=options.thread_count)
-        
-        # Submit tasks to executor
-        for _ in range(options.thread_count):
-            self._executor.submit(self.thread_proc)
+
+        for thread in self._threads:
+            thread.start()
 
     def is_finished(self) -> bool:
         if self._exc:
             raise self._exc
-            
-        # This is a bit tricky with ThreadPoolExecutor as we don't have direct access to threads
-        # But we can check if dictionary is exhausted and if we are not paused
-        # For simplicity, we might need to rely on other signals or just check if executor has pending tasks
-        # However, since we are submitting long-running tasks (thread_proc loops), 
-        # we can't easily check if they are "done" individually until the whole scan is done.
-        
-        # A simple check is if the dictionary is empty. 
-        # But since we are streaming, we don't know if it's empty until StopIteration.
-        # The original logic checked if threads are alive.
-        # Here we can't easily do that without keeping futures.
-        
-        # Let's assume we are finished if we are shutting down or if all tasks completed.
-        # But thread_proc runs until dictionary is empty.
-        
-        # We can't easily check "is_alive" on executor threads.
-        # We will rely on the fact that thread_proc exits when dictionary is empty.
-        # So we need to track active threads.
-        return False # Placeholder, logic needs to be adapted for ThreadPoolExecutor if we want exact parity
+
+        return not any(thread.is_alive() for thread in self._threads)
 
     def play(self) -> None:
         self._play_event.set()
 
     def pause(self) -> None:
         self._play_event.clear()
-        # With ThreadPoolExecutor we can't force pause easily, 
-        # but our thread_proc checks the event.
-        # We can't wait for them to stop easily without a counter.
-        # For now, we just clear the event.
+        # Wait for all threads to stop
+        for thread in self._threads:
+            if thread.is_alive():
+                self._pause_semaphore.acquire()
 
     def quit(self) -> None:
         self._quit_event.set()
         self.play()
-        if self._executor:
-            self._executor.shutdown(wait=False)
 
     def scan(self, path: str) -> None:
+        not_found_cbs = self.not_found_callbacks
+        match_cbs = self.match_callbacks
+        err_cbs = self.error_callbacks
+        is_excluded = self.is_excluded
+        requester_request = self._requester.request
+
         scanners = self.get_scanners_for(path)
         try:
-            response = self._requester.request(path)
+            response = requester_request(path)
         except RequestException as e:
-            for callback in self.error_callbacks:
+            for callback in err_cbs:
                 callback(e)
             return
 
-        if not self.waf_detected:
+        if not self.waf_detected and next(self._waf_checks) < WAF_CHECK_BUDGET:
             if waf_name := WAF.detect(response):
                 self.waf_detected = True
                 logger.warning(f"WAF Detected: {waf_name}")
 
-        if self.is_excluded(response):
-            for callback in self.not_found_callbacks:
+        if is_excluded(response):
+            for callback in not_found_cbs:
                 callback(response)
             return
 
         for tester in scanners:
             # Check if the response is unique, not wildcard
             if not tester.check(path, response):
-                for callback in self.not_found_callbacks:
+                for callback in not_found_cbs:
                     callback(response)
                 return
 
-        if options.filter_threshold:
-            hash_ = hash(response)
-            self._hashes.setdefault(hash_, 0)
-            self._hashes[hash_] += 1
+        if self._filter_threshold:
+            # The response hash is memoized, is_excluded() already computed it
+            self._hashes[hash(response)] += 1
 
-        for callback in self.match_callbacks:
+        for callback in match_cbs:
             callback(response)
 
     def thread_proc(self) -> None:
-        logger.info(f'THREAD-{threading.get_ident()} started"')
+        logger.info("THREAD-%d started", threading.get_ident())
+
+        batch_size = self.get_batch_size()
+        batch: list[str] = []
+        scanned = 0
 
-        while True:
-            try:
-                path = next(self._dictionary)
-                self.scan(self._base_path + path)
+        try:
+            while True:
+                try:
+                    # Take several paths per dictionary lock acquisition
+                    batch = self._dictionary.next_batch(batch_size)
+                    scanned = 0
+                except StopIteration:
+                    return
 
-            except StopIteration:
-                break
+                for path in batch:
+                    try:
+                        self.scan(self._base_path + path)
+                    except Exception as e:
+                        self._exc = e
+                        return
 
-            except Exception as e:
-                self._exc = e
-                break
+                    scanned += 1
 
-            finally:
-                time.sleep(options.delay)
+                    # Even sleeping 0 seconds yields to the scheduler
+                    if self._delay:
+                        time.sleep(self._delay)
 
-                if not self._play_event.is_set():
-                    logger.info(f'THREAD-{threading.get_ident()} paused"')
-                    self._pause_semaphore.release()
-                    self._play_event.wait()
-                    logger.info(f'THREAD-{threading.get_ident()} continued"')
+                    if not self._play_event.is_set():
+                        # The rest of the batch goes back to the dictionary
+                        # first, so a session saved during the pause keeps it
+                        self._dictionary.put_back(batch[scanned:])
+                        batch = []
+                        self.wait_if_paused()
+                        break
+
+                    if self._quit_event.is_set():
+                        return
 
                 if self._quit_event.is_set():
-                    break
+                    return
+        finally:
+            # Paths taken from the dictionary but not scanned are given back
+            if scanned < len(batch):
+                self._dictionary.put_back(batch[scanned:])
+
+            # pause() waits for every thread it saw alive, including the
+            # ones that are stopping
+            self.wait_if_paused()
+
+    def wait_if_paused(self) -> None:
+        if not self._play_event.is_set():
+            logger.info("THREAD-%d paused", threading.get_ident())
+            self._pause_semaphore.release()
+            self._play_event.wait()
+            logger.info("THREAD-%d continued", threading.get_ident())
 
 
 class AsyncFuzzer(BaseFuzzer):
@@ -386,7 +537,7 @@ class AsyncFuzzer(BaseFuzzer):
                 self._requester, tested=self.scanners, path=options.exclude_response
             )
 
-        for prefix in options.prefixes + DEFAULT_TEST_PREFIXES:
+        for prefix in frozenset(chain(options.prefixes, DEFAULT_TEST_PREFIXES)):
             self.scanners["prefixes"][prefix] = await AsyncScanner.create(
                 self._requester,
                 tested=self.scanners,
@@ -394,7 +545,7 @@ class AsyncFuzzer(BaseFuzzer):
                 context=f"/{self._base_path}{prefix}***",
             )
 
-        for suffix in options.suffixes + DEFAULT_TEST_SUFFIXES:
+        for suffix in frozenset(chain(options.suffixes, DEFAULT_TEST_SUFFIXES)):
             self.scanners["suffixes"][suffix] = await AsyncScanner.create(
                 self._requester,
                 tested=self.scanners,
@@ -411,10 +562,9 @@ class AsyncFuzzer(BaseFuzzer):
                     context=f"/{self._base_path}***.{extension}",
                 )
 
+        self.setup_tries()
+
     async def start(self) -> None:
-        # In Python 3.9, initialize the Semaphore within the coroutine
-        # to avoid binding to a different event loop.
-        self.sem = asyncio.Semaphore(options.thread_count)
         await self.setup_scanners()
         self.play()
 
@@ -437,51 +587,81 @@ class AsyncFuzzer(BaseFuzzer):
             task.cancel()
 
     async def scan(self, path: str) -> None:
+        not_found_cbs = self.not_found_callbacks
+        match_cbs = self.match_callbacks
+        err_cbs = self.error_callbacks
+        is_excluded = self.is_excluded
+        requester_request = self._requester.request
+
         scanners = self.get_scanners_for(path)
         try:
-            response = await self._requester.request(path)
+            response = await requester_request(path)
         except RequestException as e:
-            for callback in self.error_callbacks:
+            for callback in err_cbs:
                 callback(e)
             return
 
-        if not self.waf_detected:
+        if not self.waf_detected and next(self._waf_checks) < WAF_CHECK_BUDGET:
             if waf_name := WAF.detect(response):
                 self.waf_detected = True
                 logger.warning(f"WAF Detected: {waf_name}")
 
-        if self.is_excluded(response):
-            for callback in self.not_found_callbacks:
+        if is_excluded(response):
+            for callback in not_found_cbs:
                 callback(response)
             return
 
         for tester in scanners:
             # Check if the response is unique, not wildcard
             if not tester.check(path, response):
-                for callback in self.not_found_callbacks:
+                for callback in not_found_cbs:
                     callback(response)
                 return
 
-        if options.filter_threshold:
-            hash_ = hash(response)
-            self._hashes.setdefault(hash_, 0)
-            self._hashes[hash_] += 1
+        if self._filter_threshold:
+            # The response hash is memoized, is_excluded() already computed it
+            self._hashes[hash(response)] += 1
 
-        for callback in self.match_callbacks:
+        for callback in match_cbs:
             callback(response)
 
     async def task_proc(self) -> None:
-        # Each task will loop until dictionary is exhausted
-        while True:
-            async with self.sem:
-                await self._play_event.wait()
+        # Each task will loop until dictionary is exhausted, the number
+        # of tasks already bounds the requests in flight and the transport
+        # caps the connections
+        batch_size = self.get_batch_size()
+        batch: list[str] = []
+        scanned = 0
 
+        try:
+            while True:
                 try:
-                    path = next(self._dictionary)
-                    await self.scan(self._base_path + path)
+                    batch = self._dictionary.next_batch(batch_size)
+                    scanned = 0
                 except StopIteration:
-                    break
-                except Exception:
-                    break
-                finally:
-                    await asyncio.sleep(options.delay)
+                    return
+
+                for path in batch:
+                    if not self._play_event.is_set():
+                        # The rest of the batch goes back to the dictionary
+                        # first, so a session saved during the pause keeps it
+                        self._dictionary.put_back(batch[scanned:])
+                        batch = []
+                        await self._play_event.wait()
+                        break
+
+                    try:
+                        await self.scan(self._base_path + path)
+                        scanned += 1
+                    except Exception:
+                        # The failing path isn't given back to other tasks
+                        scanned += 1
+                        return
+                    finally:
+                        if self._delay:
+                            await asyncio.sleep(self._delay)
+        finally:
+            # Paths taken from the dictionary but not scanned (the task was
+            # cancelled by quit()) are given back
+            if scanned < len(batch):
+                self._dictionary.put_back(batch[scanned:])
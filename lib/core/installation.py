@@ -19,15 +19,22 @@
 
 from __future__ import annotations
 
+import re
 import subprocess
 import sys
 import importlib.metadata
+from functools import lru_cache
 from pathlib import Path
 
 from lib.core.exceptions import FailedDependenciesInstallation
 from lib.core.settings import SCRIPT_PATH
 from lib.utils.file import FileUtils
 
+try:
+    from packaging.requirements import InvalidRequirement, Requirement
+except ImportError:
+    Requirement = None
+
 REQUIREMENTS_FILE = str(Path(SCRIPT_PATH) / "requirements.txt")
 
 
@@ -39,38 +46,57 @@ def get_dependencies() -> list[str]:
         exit(1)
 
 
-# Check if all dependencies are satisfied
-def check_dependencies() -> None:
-    for requirement in get_dependencies():
-        # Simple parsing of requirement string (e.g., "requests>=2.27.0")
-        # Handle comments and empty lines
-        requirement = requirement.strip()
-        if not requirement or requirement.startswith("#"):
+@lru_cache(maxsize=None)
+def get_required_names() -> tuple[str, ...]:
+    """Names of the distributions required on this platform"""
+
+    names = []
+
+    for line in get_dependencies():
+        line = line.split("#")[0].strip()
+        if not line:
             continue
-            
-        package_name = requirement.split(">=")[0].split("==")[0].split("<")[0].strip()
-        
-        # Handle special cases where package name differs from import name
-        # e.g. beautifulsoup4 -> bs4, PySocks -> socks
-        import_name = package_name
-        if package_name.lower() == "beautifulsoup4":
-            import_name = "bs4"
-        elif package_name.lower() == "pysocks":
-            import_name = "socks"
-        elif package_name.lower() == "mysql-connector-python":
-            import_name = "mysql.connector"
-        elif package_name.lower() == "fake-useragent":
-            import_name = "fake_useragent"
-            
+
+        if Requirement is None:
+            # Without packaging, only keep the leading name (PEP 508) and
+            # ignore extras, versions and markers
+            if match := re.match(r"[A-Za-z0-9][A-Za-z0-9._-]*", line):
+                names.append(match.group(0))
+            continue
+
         try:
-            importlib.metadata.version(package_name)
-        except importlib.metadata.PackageNotFoundError:
-            # If package is not found, try to import it
-            try:
-                __import__(import_name)
-            except ImportError:
-                # If both fail, raise exception to trigger installation
-                raise Exception(f"Dependency missing: {package_name}") from None
+            requirement = Requirement(line)
+        except InvalidRequirement:
+            continue
+
+        if requirement.marker is None or requirement.marker.evaluate():
+            names.append(requirement.name)
+
+    return tuple(names)
+
+
+def canonicalize_name(name: str) -> str:
+    # Normalized distribution name (PEP 503)
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def get_installed_distributions() -> set[str]:
+    return {
+        canonicalize_name(dist.metadata["Name"])
+        for dist in importlib.metadata.distributions()
+        if dist.metadata["Name"]
+    }
+
+
+# Check if all dependencies are satisfied
+def check_dependencies() -> None:
+    # Scan the installed distributions only once, metadata is authoritative
+    # so modules don't need to be imported to know if they are there
+    installed = get_installed_distributions()
+
+    for package_name in get_required_names():
+        if canonicalize_name(package_name) not in installed:
+            raise Exception(f"Dependency missing: {package_name}")
 
 
 def install_dependencies() -> None:
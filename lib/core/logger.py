@@ -23,7 +23,9 @@ from lib.core.data import options
 
 
 logger = logging.getLogger("dirsearch")
-logger.setLevel(logging.DEBUG)
+# Nothing is written until enable_logging() is called, so don't even build
+# records below warnings until then
+logger.setLevel(logging.WARNING)
 # Default to NullHandler to avoid "No handler found" warnings
 logger.addHandler(logging.NullHandler())
 
@@ -34,6 +36,7 @@ def enable_logging() -> None:
         if isinstance(handler, logging.NullHandler):
             logger.removeHandler(handler)
             
+    logger.setLevel(logging.DEBUG)
     formatter = logging.Formatter('%(asctime)s [%(levelname)s] %(message)s')
     
     # File Handler
@@ -18,13 +18,17 @@
 
 from __future__ import annotations
 
+import os
 from optparse import Values
 from typing import Any, Dict
 from lib.core.settings import (
+    ASYNC_CONCURRENCY_PER_CPU,
     AUTHENTICATION_TYPES,
     COMMON_EXTENSIONS,
+    DEFAULT_THREAD_COUNT,
     DEFAULT_TOR_PROXIES,
     FILE_BASED_OUTPUT_FORMATS,
+    MAX_ASYNC_CONCURRENCY,
     SCRIPT_PATH,
 )
 from lib.parse.cmdline import parse_arguments
@@ -283,8 +287,17 @@ def merge_config(opt: Values) -> Values:
     config.read(opt.config)
 
     # General
-    opt.thread_count = opt.thread_count or config.safe_getint("general", "threads", 25)
     opt.async_mode = opt.async_mode or config.safe_getboolean("general", "async")
+    thread_count = opt.thread_count or config.safe_getint(
+        "general", "threads", DEFAULT_THREAD_COUNT
+    )
+    # Unless the user picked a number, use more workers in asynchronous mode
+    if opt.async_mode and not opt.thread_count and thread_count == DEFAULT_THREAD_COUNT:
+        thread_count = min(
+            max(thread_count, (os.cpu_count() or 1) * ASYNC_CONCURRENCY_PER_CPU),
+            MAX_ASYNC_CONCURRENCY,
+        )
+    opt.thread_count = thread_count
     opt.filter_threshold = opt.filter_threshold or config.safe_getint("general", "filter-threshold", 0)
     opt.include_status_codes = opt.include_status_codes or config.safe_get(
         "general", "include-status"
@@ -46,6 +46,17 @@ OPTIONS_FILE = "options.ini"
 
 IS_WINDOWS = sys.platform in ("win32", "msys")
 
+# dataclass(slots=True) is only available since Python 3.10
+DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+DEFAULT_THREAD_COUNT = 25
+
+# Asynchronous workers are I/O-bound coroutines, so their default number
+# scales with the host (capped, connection pools stop scaling beyond that)
+ASYNC_CONCURRENCY_PER_CPU = 5
+
+MAX_ASYNC_CONCURRENCY = 500
+
 DEFAULT_ENCODING = "utf-8"
 
 NEW_LINE = os.linesep
@@ -76,6 +87,12 @@ DEFAULT_TEST_PREFIXES = (".", ".ht")
 
 DEFAULT_TEST_SUFFIXES = ("/", "~")
 
+# Number of scanned responses checked for a WAF before giving up
+WAF_CHECK_BUDGET = 32
+
+# Above this number of prefix and suffix scanners, they are looked up in tries
+SCANNER_TRIE_THRESHOLD = 16
+
 DEFAULT_TOR_PROXIES = ("socks5://127.0.0.1:9050", "socks5://127.0.0.1:9150")
 
 DEFAULT_HEADERS = {
@@ -124,6 +141,31 @@ ITER_CHUNK_SIZE = 1024 * 1024
 
 MAX_RESPONSE_SIZE = 80 * 1024 * 1024
 
+BINARY_CHECK_SIZE = 4 * 1024
+
+# Total size in bytes of the response bodies kept for sharing between
+# identical responses
+BODY_INTERN_MAX_SIZE = 16 * 1024 * 1024
+
+LINE_COUNT_BLOCK_SIZE = 1024 * 1024
+
+DICTIONARY_BATCH_SIZE = 64
+
+WORDLIST_BATCH_SIZE = 1024 * 1024
+
+# Above this number of patterns, an Aho-Corasick automaton is used
+# (if pyahocorasick is installed) instead of checking them one by one
+MULTI_PATTERN_THRESHOLD = 4
+
+# Minimum seconds between two redraws of the progress bar
+PROGRESS_REFRESH_INTERVAL = 0.05
+
+# Seconds the terminal width is cached for
+TERMINAL_WIDTH_TTL = 1
+
+# Size of the output buffer when stdout isn't a terminal
+OUTPUT_BUFFER_SIZE = 64 * 1024
+
 TEST_PATH_LENGTH = 6
 
 MAX_CONSECUTIVE_REQUEST_ERRORS = 75
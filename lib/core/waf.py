@@ -1,19 +1,28 @@
 # -*- coding: utf-8 -*-
 import re
 import json
+import threading
 from pathlib import Path
 from lib.connection.response import BaseResponse
 from lib.core.settings import SCRIPT_PATH
+from lib.utils.prefilter import build_prefilter
+
+# Header values that are matched case-insensitively
+_LOWER_VALUE_HEADERS = frozenset({"server", "via", "x-cdn"})
 
 class WAF:
     _signatures = None
     _regexes = {}
+    _combined = {}
+    _prefilter = None
+    _prefilter_sources = []
+    _local = threading.local()
+    # Plain text error pages of the web servers
+    _NGINX_403 = re.compile(r"403\s+forbidden", re.IGNORECASE)
+    _APACHE_403 = re.compile(r"forbidden", re.IGNORECASE)
 
     @classmethod
     def load_signatures(cls):
-        if cls._signatures is not None:
-            return
-
         sig_path = Path(SCRIPT_PATH) / "db" / "waf_signatures.json"
         try:
             with open(sig_path, "r") as f:
@@ -22,6 +31,8 @@ class WAF:
             cls._signatures = {}
 
         # Compile regexes
+        cls._regexes = {}
+        cls._combined = {}
         for key, patterns in cls._signatures.items():
             cls._regexes[key] = {}
             for type_, pattern in patterns.items():
@@ -30,10 +41,86 @@ class WAF:
                 except re.error:
                     pass
 
+            # All the signatures of a source in one alternation, the named
+            # group that matched tells which one it is
+            try:
+                cls._combined[key] = re.compile(
+                    "|".join(
+                        f"(?P<{type_}>{regex.pattern})"
+                        for type_, regex in cls._regexes[key].items()
+                    ),
+                    re.IGNORECASE,
+                )
+            except re.error:
+                pass
+
+        # With Hyperscan, one scan of the body tells which sources
+        # are worth searching at all
+        cls._prefilter_sources = [
+            key for key, regexes in cls._regexes.items() for _ in regexes
+        ]
+        cls._prefilter = build_prefilter(
+            [
+                regex.pattern
+                for regexes in cls._regexes.values()
+                for regex in regexes.values()
+            ]
+        )
+
+    @classmethod
+    def get_candidate_sources(cls, body: str) -> set[str]:
+        """Sources whose signatures might match the body"""
+
+        # The last body is remembered, analyze() can look for several sources
+        local = cls._local
+        if getattr(local, "body", None) is not body:
+            local.candidates = {
+                cls._prefilter_sources[id_] for id_ in cls._prefilter.scan(body)
+            }
+            local.body = body
+
+        return local.candidates
+
+    @classmethod
+    def match_signature(cls, key: str, body: str) -> tuple[str, re.Match] | None:
+        """Find the first signature of a source (in file order) matching the body"""
+
+        if cls._prefilter is not None and key not in cls.get_candidate_sources(body):
+            return None
+
+        if key not in cls._combined:
+            # Fall back to the separate regexes
+            for type_, regex in cls._regexes.get(key, {}).items():
+                if match := regex.search(body):
+                    return type_, match
+            return None
+
+        if not (match := cls._combined[key].search(body)):
+            return None
+
+        # A signature listed before the one found can still match, but
+        # only further in the body
+        for type_, regex in cls._regexes[key].items():
+            if type_ == match.lastgroup:
+                break
+            if earlier := regex.search(body, match.start()):
+                return type_, earlier
+
+        return match.lastgroup, match
+
     @classmethod
     def analyze(cls, response: BaseResponse) -> dict:
-        cls.load_signatures()
-        
+        # The same response is analyzed by the fuzzer and when it's reported
+        if not isinstance(response, BaseResponse):
+            return cls._analyze(response)
+
+        if response.waf_result is None:
+            response.waf_result = cls._analyze(response)
+
+        return response.waf_result
+
+    @classmethod
+    def _analyze(cls, response: BaseResponse) -> dict:
         result = {
             "source": "Unknown",
             "confidence": "Low",
@@ -42,7 +129,11 @@ class WAF:
         }
         
         # Prepare data
-        headers = {k.lower(): v for k, v in response.headers.items()}
+        headers = {}
+        for key, value in response.headers.items():
+            key = key.lower()
+            headers[key] = value.lower() if key in _LOWER_VALUE_HEADERS else value
+        server = headers.get("server", "")
         body = ""
         if hasattr(response, "content") and response.content:
             body = response.content
@@ -52,16 +143,17 @@ class WAF:
         # ---------------------------------------------------------
         # 1. Cloudflare Logic
         # ---------------------------------------------------------
-        is_cloudflare_infra = "cloudflare" in headers.get("server", "").lower() or "cf-ray" in headers
+        is_cloudflare_infra = "cloudflare" in server or "cf-ray" in headers
 
         if is_cloudflare_infra:
             result["waf_present"] = True
             
-            if "Cloudflare" in cls._regexes:
-                if "block" in cls._regexes["Cloudflare"] and (match := cls._regexes["Cloudflare"]["block"].search(body)):
+            if signature := cls.match_signature("Cloudflare", body):
+                type_, match = signature
+                if type_ == "block":
                      return {"source": "Cloudflare WAF", "confidence": "High", "trigger": f"Body: {match.group(0)}", "waf_present": True}
                 
-                if "app_error" in cls._regexes["Cloudflare"] and (match := cls._regexes["Cloudflare"]["app_error"].search(body)):
+                if type_ == "app_error":
                      return {"source": "Cloudflare (App Logic)", "confidence": "High", "trigger": f"Body: {match.group(0)}", "waf_present": True}
             
             return {"source": "Cloudflare", "confidence": "Medium", "trigger": "Header: Server: cloudflare", "waf_present": True}
@@ -70,9 +162,9 @@ class WAF:
         # 2. AWS WAF / CloudFront Logic
         # ---------------------------------------------------------
         is_aws_infra = (
-            "cloudfront" in headers.get("via", "").lower() or
+            "cloudfront" in headers.get("via", "") or
             "x-amz-cf-id" in headers or
-            "awselb" in headers.get("server", "").lower() or
+            "awselb" in server or
             "x-amzn-errortype" in headers
         )
 
@@ -83,12 +175,13 @@ class WAF:
             if headers.get("x-amzn-errortype") == "ForbiddenException":
                 return {"source": "AWS WAF", "confidence": "High", "trigger": "AWS Block Signature", "waf_present": True}
             
-            if "AWS" in cls._regexes:
-                if "block" in cls._regexes["AWS"] and cls._regexes["AWS"]["block"].search(body):
+            if signature := cls.match_signature("AWS", body):
+                type_, _ = signature
+                if type_ == "block":
                     return {"source": "AWS WAF", "confidence": "High", "trigger": "AWS Block Signature", "waf_present": True}
             
                 # App Logic
-                if "app_error" in cls._regexes["AWS"] and cls._regexes["AWS"]["app_error"].search(body):
+                if type_ == "app_error":
                     return {"source": "AWS (App Logic)", "confidence": "High", "trigger": "AWS App Signature", "waf_present": True}
             
             return {"source": "AWS/CloudFront", "confidence": "Medium", "trigger": "AWS Infrastructure Header", "waf_present": True}
@@ -96,13 +189,13 @@ class WAF:
         # ---------------------------------------------------------
         # 3. Nginx Logic
         # ---------------------------------------------------------
-        if "nginx" in headers.get("server", "").lower():
+        if "nginx" in server:
             # True Block (Server Config)
             # Check for stock page signature OR plain text "403 Forbidden" in a short body
-            if "Nginx" in cls._regexes and "stock" in cls._regexes["Nginx"] and cls._regexes["Nginx"]["stock"].search(body):
+            if (signature := cls.match_signature("Nginx", body)) and signature[0] == "stock":
                  return {"source": "Nginx (Server Block)", "confidence": "High", "trigger": "Nginx Stock Page", "waf_present": False}
             
-            if len(body) < 200 and "403 forbidden" in body.lower():
+            if len(body) < 200 and cls._NGINX_403.search(body):
                  return {"source": "Nginx (Server Block)", "confidence": "High", "trigger": "Nginx Stock Page", "waf_present": False}
             
             # App Logic (Default if header is nginx but body is not stock)
@@ -111,12 +204,12 @@ class WAF:
         # ---------------------------------------------------------
         # 4. Apache Logic
         # ---------------------------------------------------------
-        if "apache" in headers.get("server", "").lower():
+        if "apache" in server:
              # True Block
-             if "Apache" in cls._regexes and "stock" in cls._regexes["Apache"] and cls._regexes["Apache"]["stock"].search(body):
+             if (signature := cls.match_signature("Apache", body)) and signature[0] == "stock":
                  return {"source": "Apache (Server Block)", "confidence": "High", "trigger": "Apache Stock Page", "waf_present": False}
              
-             if len(body) < 200 and "forbidden" in body.lower():
+             if len(body) < 200 and cls._APACHE_403.search(body):
                  return {"source": "Apache (Server Block)", "confidence": "High", "trigger": "Apache Stock Page", "waf_present": False}
              
              # App Logic
@@ -125,14 +218,14 @@ class WAF:
         # ---------------------------------------------------------
         # 5. Generic / Other WAFs
         # ---------------------------------------------------------
-        if "Generic" in cls._regexes and "block" in cls._regexes["Generic"] and (match := cls._regexes["Generic"]["block"].search(body)):
+        if (signature := cls.match_signature("Generic", body)) and signature[0] == "block":
+            match = signature[1]
             return {"source": "Generic WAF", "confidence": "Medium", "trigger": f"Body: {match.group(0)}", "waf_present": True}
 
-        if "x-cdn" in headers and "incapsula" in headers["x-cdn"].lower():
+        if "x-cdn" in headers and "incapsula" in headers["x-cdn"]:
             return {"source": "Incapsula", "confidence": "High", "trigger": "Header: X-CDN: Incapsula", "waf_present": True}
             
-        if "server" in headers:
-            server = headers["server"].lower()
+        if server:
             if "iis" in server:
                 return {"source": "IIS", "confidence": "High", "trigger": "Header: Server: iis", "waf_present": False}
             if "sucuri" in server:
@@ -148,3 +241,7 @@ class WAF:
         if result["source"] != "Unknown":
             return result["source"]
         return None
+
+
+# Load the signatures once, before any worker thread can analyze a response
+WAF.load_signatures()
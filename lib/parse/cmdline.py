@@ -165,7 +165,7 @@ def parse_arguments() -> Values:
         type="int",
         dest="thread_count",
         metavar="THREADS",
-        help="Number of threads",
+        help="Number of threads (concurrent I/O-bound workers in asynchronous mode)",
     )
     general.add_option(
         "-a",
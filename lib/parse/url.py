@@ -16,9 +16,12 @@
 #
 #  Author: Mauro Soria
 
+from functools import lru_cache
+
 from lib.utils.common import lstrip_once
 
 
+@lru_cache(maxsize=8192)
 def clean_path(path: str, keep_queries: bool = False, keep_fragment: bool = False) -> str:
     if not keep_fragment:
         path = path.split("#")[0]
@@ -28,6 +31,7 @@ def clean_path(path: str, keep_queries: bool = False, keep_fragment: bool = Fals
     return path
 
 
+@lru_cache(maxsize=8192)
 def parse_path(value: str) -> str:
     try:
         scheme, url = value.split("//", 1)
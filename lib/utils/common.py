@@ -17,6 +17,7 @@
 #  Author: Mauro Soria
 
 import os
+import re
 import sys
 
 from functools import reduce
@@ -79,11 +80,13 @@ def get_valid_filename(string):
     return string
 
 
+SIZE_UNITS = ("B", "KB", "MB", "GB", "TB", "PB", "EB", "ZB", "YB")
+
+
 def get_readable_size(num):
     base = 1024
-    units = ("B", "KB", "MB", "GB", "TB", "PB", "EB", "ZB", "YB")
 
-    for unit in units:
+    for unit in SIZE_UNITS:
         if -base < num < base:
             return f"{num}{unit}"
 
@@ -92,8 +95,43 @@ def get_readable_size(num):
     return f"{num}TB"
 
 
-def is_binary(bytes) -> bool:
-    return bool(bytes.translate(None, TEXT_CHARS))
+def _readable_size_key(size):
+    match = re.fullmatch(r"(\d+)([A-Z]+)", size)
+    if not match or match.group(2) not in SIZE_UNITS:
+        return None
+
+    return SIZE_UNITS.index(match.group(2)), int(match.group(1))
+
+
+def _first_length(predicate, high=2 ** 63):
+    # Binary search of the first length matching a monotonic predicate
+    low = 0
+    while low < high:
+        middle = (low + high) // 2
+        if predicate(middle):
+            high = middle
+        else:
+            low = middle + 1
+
+    return low
+
+
+# Range of lengths (start included, end excluded) that get_readable_size()
+# formats as the given size, so sizes can be compared numerically
+def get_readable_size_range(size):
+    target = _readable_size_key(size)
+    if target is None:
+        return None
+
+    start = _first_length(lambda num: _readable_size_key(get_readable_size(num)) >= target)
+    end = _first_length(lambda num: _readable_size_key(get_readable_size(num)) > target)
+
+    return (start, end) if start < end else None
+
+
+def is_binary(data: bytes) -> bool:
+    # Deleting every text character in one C-level pass, anything left is binary
+    return bool(data.translate(None, TEXT_CHARS))
 
 
 def is_ipv6(ip):
@@ -136,13 +174,24 @@ def read_stdin():
     return buffer
 
 
+# The different ways a substring might be encoded in an HTML body
+# (URL encoding, HTML escaping, ...)
+def get_all_encodings(string):
+    return (
+        quote(string),
+        quote(quote(string)),
+        unquote(string),
+        unquote(unquote(string)),
+        escape(string),
+        dumps(string),
+        string,
+    )
+
+
 # Replace a substring from an HTML body, where the substring might be encoded
 # in many different ways (URL encoding, HTML escaping, ...).
 def replace_from_all_encodings(string, to_replace, replace_with):
-    string = string.replace(quote(to_replace), replace_with)
-    string = string.replace(quote(quote(to_replace)), replace_with)
-    string = string.replace(unquote(to_replace), replace_with)
-    string = string.replace(unquote(unquote(to_replace)), replace_with)
-    string = string.replace(escape(to_replace), replace_with)
-    string = string.replace(dumps(to_replace), replace_with)
-    return string.replace(to_replace, replace_with)
+    for encoded in get_all_encodings(to_replace):
+        string = string.replace(encoded, replace_with)
+
+    return string
@@ -18,6 +18,8 @@
 
 import re
 from functools import lru_cache
+from io import BytesIO
+from urllib.parse import urlsplit
 
 try:
     from bs4 import BeautifulSoup
@@ -25,6 +27,12 @@ try:
 except ImportError:
     HAS_BS4 = False
 
+try:
+    from lxml import etree
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
 from lib.core.settings import (
     CRAWL_ATTRIBUTES, CRAWL_TAGS,
     MEDIA_EXTENSIONS, ROBOTS_TXT_REGEX,
@@ -32,19 +40,79 @@ from lib.core.settings import (
 )
 from lib.parse.url import clean_path, parse_path
 from lib.utils.common import merge_path
+from lib.utils.prefilter import build_prefilter
+
+
+_JS_ROOT_RE = re.compile(r"['\"](/[a-zA-Z0-9-._~!$&*+,;=:@?%/]+)['\"]")
+_JS_SUBDIR_RE = re.compile(
+    r"['\"]([a-zA-Z0-9-._~!$&*+,;=:@?%]+(?:/[a-zA-Z0-9-._~!$&*+,;=:@?%]+)+)['\"]"
+)
+_JS_FILES_RE = re.compile(
+    r"['\"]([a-zA-Z0-9-._~!$&*+,;=:@?%]+\.(?:json|xml|php|asp|aspx|jsp|html|htm|js|css|map|txt|conf|config|sql|db|bak|old))['\"]"
+)
+# One Hyperscan pass tells which of the JS patterns are worth running
+_JS_PREFILTER = build_prefilter(
+    [regex.pattern for regex in (_JS_ROOT_RE, _JS_SUBDIR_RE, _JS_FILES_RE)]
+)
+# Quoted strings that look like subdirectory paths but are MIME types
+_MIME_TYPES = frozenset(("application/json", "text/html", "text/plain"))
+_HREF_RE = re.compile(r'href=["\'](.*?)["\']')
+_SRC_RE = re.compile(r'src=["\'](.*?)["\']')
+_ROBOTS_RE = re.compile(ROBOTS_TXT_REGEX)
+_URI_RE = re.compile(URI_REGEX)
+# Links that never point to a path of the target (or the page itself)
+_ABSOLUTE_PREFIXES = (
+    "http://", "https://", "mailto:", "javascript:", "data:", "tel:", "ftp://", "#",
+)
+
+
+_CRAWL_TAGS_SET = frozenset(CRAWL_TAGS)
+_MEDIA_EXTENSIONS = frozenset(ext.lstrip(".").lower() for ext in MEDIA_EXTENSIONS)
+
+
+@lru_cache(maxsize=1024)
+def _scope_re(scope):
+    return re.compile(re.escape(scope) + "[a-zA-Z0-9-._~!$&*+,;=:@?%/]+")
+
+
+def _resolve(url, scope, value):
+    if value.startswith("/"):
+        return value[1:]
+    elif value.startswith(scope):
+        return value[len(scope):]
+    elif value.startswith(_ABSOLUTE_PREFIXES):
+        return None
+    # Only a value with a colon can have another scheme
+    elif ":" in value and _URI_RE.search(value):
+        return None
+
+    return parse_path(merge_path(url, value))
 
 
 def _filter(paths):
-    return {clean_path(path, keep_queries=True) for path in paths if not path.endswith(MEDIA_EXTENSIONS)}
+    results = set()
+
+    for path in paths:
+        path = clean_path(path, keep_queries=True)
+        # Only a real extension counts, "contacts" doesn't end with ".ts"
+        name = path.split("?", 1)[0]
+        dot = name.rfind(".")
+        if dot != -1 and name[dot + 1:].lower() in _MEDIA_EXTENSIONS:
+            continue
+
+        results.add(path)
+
+    return results
 
 
 class Crawler:
     @classmethod
     def crawl(cls, response):
-        scope = "/".join(response.url.split("/")[:3]) + "/"
+        url = urlsplit(response.url)
+        scope = f"{url.scheme}://{url.netloc}/"
         content_type = response.headers.get("content-type", "")
 
-        if "text/html" in content_type:
+        if content_type.startswith("text/html"):
             return cls.html_crawl(response.url, scope, response.content)
         elif "javascript" in content_type or response.path.endswith(".js"):
             return cls.js_crawl(response.url, scope, response.content)
@@ -53,51 +121,83 @@ class Crawler:
         else:
             return cls.text_crawl(response.url, scope, response.content)
 
+    # Links are yielded by generators and filtered into a set in one pass
+    @classmethod
+    def js_crawl(cls, url, scope, content):
+        return _filter(cls._js_links(url, scope, content))
+
+    @classmethod
+    def text_crawl(cls, url, scope, content):
+        return _filter(cls._text_links(url, scope, content))
+
+    @classmethod
+    def html_crawl(cls, url, scope, content):
+        return _filter(cls._html_links(url, scope, content))
+
     @staticmethod
-    @lru_cache(maxsize=None)
-    def js_crawl(url, scope, content):
-        results = set()
+    def robots_crawl(url, scope, content):
+        return _filter(_ROBOTS_RE.findall(content))
+
+    @staticmethod
+    def _js_links(url, scope, content):
+        hits = _JS_PREFILTER.scan(content) if _JS_PREFILTER else (0, 1, 2)
 
         # 1. Absolute URLs matching scope
-        regex_absolute = re.escape(scope) + "[a-zA-Z0-9-._~!$&*+,;=:@?%/]+"
-        for match in re.findall(regex_absolute, content):
-            results.add(match[len(scope):])
+        for match in _scope_re(scope).findall(content):
+            yield match[len(scope):]
 
         # 2. Relative paths starting with /
-        regex_root = r"['\"](/[a-zA-Z0-9-._~!$&*+,;=:@?%/]+)['\"]"
-        for match in re.findall(regex_root, content):
-            results.add(match[1:])
+        if 0 in hits:
+            for match in _JS_ROOT_RE.findall(content):
+                yield match[1:]
 
         # 3. Relative paths with subdirectories
-        regex_subdir = r"['\"]([a-zA-Z0-9-._~!$&*+,;=:@?%]+(?:/[a-zA-Z0-9-._~!$&*+,;=:@?%]+)+)['\"]"
-        for match in re.findall(regex_subdir, content):
-            if match not in ["application/json", "text/html", "text/plain"]:
-                results.add(match)
+        if 1 in hits:
+            for match in _JS_SUBDIR_RE.findall(content):
+                if match not in _MIME_TYPES:
+                    yield match
 
         # 4. Files with extensions
-        regex_files = r"['\"]([a-zA-Z0-9-._~!$&*+,;=:@?%]+\.(?:json|xml|php|asp|aspx|jsp|html|htm|js|css|map|txt|conf|config|sql|db|bak|old))['\"]"
-        for match in re.findall(regex_files, content):
-            results.add(match)
-
-        return _filter(results)
+        if 2 in hits:
+            for match in _JS_FILES_RE.findall(content):
+                yield match
 
     @staticmethod
-    @lru_cache(maxsize=None)
-    def text_crawl(url, scope, content):
-        results = []
-        regex = re.escape(scope) + "[a-zA-Z0-9-._~!$&*+,;=:@?%/]+"
-
-        for match in re.findall(regex, content):
-            results.append(match[len(scope):])
-
-        return _filter(results)
+    def _text_links(url, scope, content):
+        for match in _scope_re(scope).findall(content):
+            yield match[len(scope):]
 
     @staticmethod
-    @lru_cache(maxsize=None)
-    def html_crawl(url, scope, content):
-        results = []
-        
-        if HAS_BS4:
+    def _html_links(url, scope, content):
+        if HAS_LXML:
+            # Links are extracted while the page is parsed and every finished
+            # element is dropped, so the whole tree is never held in memory.
+            # Bytes are passed because lxml rejects strings with an encoding
+            # declaration
+            events = etree.iterparse(
+                BytesIO(content.encode("utf-8")),
+                events=("end",),
+                html=True,
+                encoding="utf-8",
+            )
+            try:
+                for _, elem in events:
+                    if elem.tag in _CRAWL_TAGS_SET:
+                        for attr in CRAWL_ATTRIBUTES:
+                            value = elem.get(attr)
+
+                            if value and (path := _resolve(url, scope, value)) is not None:
+                                yield path
+
+                    elem.clear()
+                    # The root element has no parent
+                    if (parent := elem.getparent()) is not None:
+                        while elem.getprevious() is not None:
+                            del parent[0]
+            except etree.XMLSyntaxError:
+                # Empty document
+                pass
+        elif HAS_BS4:
             # Prefer lxml if available, otherwise html.parser
             # lxml is much faster than html.parser
             try:
@@ -113,32 +213,12 @@ class Crawler:
                         if not value:
                             continue
 
-                        if value.startswith("/"):
-                            results.append(value[1:])
-                        elif value.startswith(scope):
-                            results.append(value[len(scope):])
-                        elif not re.search(URI_REGEX, value):
-                            new_url = merge_path(url, value)
-                            results.append(parse_path(new_url))
+                        if (path := _resolve(url, scope, value)) is not None:
+                            yield path
         else:
             # Fallback to regex if BS4 is not installed (though it is in requirements)
             # or if we want a lightweight fallback
-            regex_href = r'href=["\'](.*?)["\']'
-            regex_src = r'src=["\'](.*?)["\']'
-            
-            for regex in [regex_href, regex_src]:
-                for match in re.findall(regex, content):
-                    if match.startswith("/"):
-                        results.append(match[1:])
-                    elif match.startswith(scope):
-                        results.append(match[len(scope):])
-                    elif not re.search(URI_REGEX, match):
-                        new_url = merge_path(url, match)
-                        results.append(parse_path(new_url))
-
-        return _filter(results)
-
-    @staticmethod
-    @lru_cache(maxsize=None)
-    def robots_crawl(url, scope, content):
-        return _filter(re.findall(ROBOTS_TXT_REGEX, content))
+            for regex in (_HREF_RE, _SRC_RE):
+                for match in regex.findall(content):
+                    if (path := _resolve(url, scope, match)) is not None:
+                        yield path
@@ -19,9 +19,12 @@
 from __future__ import annotations
 
 import os
+from functools import partial
 from pathlib import Path
 from typing import Union, List
 
+from lib.core.settings import LINE_COUNT_BLOCK_SIZE
+
 
 class File:
     def __init__(self, *path_components):
@@ -69,15 +72,15 @@ class FileUtils:
 
     @staticmethod
     def get_abs_path(file_name: str) -> str:
-        return str(Path(file_name).resolve())
+        return os.path.realpath(file_name)
 
     @staticmethod
     def exists(file_name: str) -> bool:
-        return Path(file_name).exists()
+        return os.path.exists(file_name)
 
     @staticmethod
     def is_empty(file_name: str) -> bool:
-        return Path(file_name).stat().st_size == 0
+        return os.stat(file_name).st_size == 0
 
     @staticmethod
     def can_read(file_name: str) -> bool:
@@ -99,39 +102,75 @@ class FileUtils:
 
     @staticmethod
     def read(file_name: str) -> str:
-        return Path(file_name).read_text(encoding="utf-8", errors="replace")
+        with open(file_name, encoding="utf-8", errors="replace") as fd:
+            return fd.read()
 
     @classmethod
     def get_files(cls, directory: str) -> List[str]:
         files = []
-        p = Path(directory)
-        if not p.exists():
-            return []
-            
-        for item in p.rglob("*"):
-            if item.is_file():
-                files.append(str(item))
+        stack = [directory]
+
+        while stack:
+            try:
+                entries = os.scandir(stack.pop())
+            except OSError:
+                continue
+
+            with entries:
+                for entry in entries:
+                    # Symlinked directories aren't followed, they could loop
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file():
+                        files.append(entry.path)
+
         return files
 
     @staticmethod
     def get_lines(file_name: str) -> List[str]:
-        with open(file_name, "r", errors="replace") as fd:
-            return fd.read().splitlines()
+        # Split as bytes and decode line by line, the whole file is never
+        # decoded into one large string first
+        with open(file_name, "rb") as fd:
+            return [
+                line.decode("utf-8", errors="replace")
+                for line in fd.read().splitlines()
+            ]
+
+    @staticmethod
+    def count_lines(file_name: str) -> int:
+        count = 0
+        last_block = b""
+
+        try:
+            with open(file_name, "rb") as fd:
+                # Count newlines block by block, bytes.count() scans in C
+                for block in iter(partial(fd.read, LINE_COUNT_BLOCK_SIZE), b""):
+                    count += block.count(b"\n")
+                    last_block = block
+        except OSError:
+            return 0
+
+        # The last line might not be terminated
+        if last_block and not last_block.endswith(b"\n"):
+            count += 1
+
+        return count
 
     @staticmethod
     def is_dir(path: str) -> bool:
-        return Path(path).is_dir()
+        return os.path.isdir(path)
 
     @staticmethod
     def is_file(path: str) -> bool:
-        return Path(path).is_file()
+        return os.path.isfile(path)
 
     @staticmethod
     def parent(path: str, depth: int = 1) -> str:
-        p = Path(path)
+        path = os.path.normpath(path)
         for _ in range(depth):
-            p = p.parent
-        return str(p)
+            # Like Path.parent, the parent of a bare file name is "."
+            path = os.path.dirname(path) or "."
+        return path
 
     @classmethod
     def create_dir(cls, directory: str) -> None:
@@ -139,9 +178,9 @@ class FileUtils:
 
     @staticmethod
     def write_lines(file_name: str, lines: Union[List[str], str], overwrite: bool = False) -> None:
-        mode = "w" if overwrite else "a"
         if isinstance(lines, list):
-            lines = os.linesep.join(lines)
-        
-        with open(file_name, mode) as f:
-            f.writelines(lines)
+            lines = "\n".join(lines)
+
+        # Encoded once and written at once, without newline translation
+        with open(file_name, "wb" if overwrite else "ab") as f:
+            f.write(lines.encode("utf-8"))
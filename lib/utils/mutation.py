@@ -1,55 +1,70 @@
 import re
 
+_VERSION_RE = re.compile(r"v(\d+)")
+_NUMBER_RE = re.compile(r"(\d+)")
+
+
+def _increment_version(match: re.Match) -> str:
+    return f"v{int(match.group(1)) + 1}"
+
+
+def _decrement_version(match: re.Match) -> str:
+    return f"v{max(0, int(match.group(1)) - 1)}"
+
+
+def _increment_number(match: re.Match) -> str:
+    return str(int(match.group(1)) + 1)
+
+
+def _decrement_number(match: re.Match) -> str:
+    return str(max(0, int(match.group(1)) - 1))
+
+
+# Backup and swap files of any path
+_SUFFIXES = (".bak", ".old", "~", ".swp", ".tmp")
+# Alternative extensions of some server-side scripts
+_EXT_MAP = {
+    "php": ("phps", "php.bak", "php.old"),
+    "jsp": ("jsp.bak", "jspx"),
+    "asp": ("aspx",),
+    "aspx": ("asp",),
+}
+# Environment/debug subdirectories
+_DIR_SUFFIXES = ("/debug", "/test", "/admin")
+
+
 class Mutator:
     @staticmethod
     def mutate(path: str) -> set[str]:
-        mutations = set()
-        
-        # 1. Version mutation (v1 -> v2, v1.0 -> v1.1)
+        # 1. Common backup extensions
+        mutations = {path + suffix for suffix in _SUFFIXES}
+
+        # 2. Version mutation (v1 -> v2, v1.0 -> v1.1)
         if "v" in path:
             # v1 -> v2
             try:
-                mutations.add(re.sub(r"v(\d+)", lambda m: f"v{int(m.group(1)) + 1}", path))
-                mutations.add(re.sub(r"v(\d+)", lambda m: f"v{max(0, int(m.group(1)) - 1)}", path))
-            except Exception:
+                mutations.add(_VERSION_RE.sub(_increment_version, path))
+                mutations.add(_VERSION_RE.sub(_decrement_version, path))
+            except ValueError:
+                # Digit runs too long for int()
                 pass
-        
-        # 2. Number mutation (user1 -> user2)
+
+        # 3. Number mutation (user1 -> user2)
         try:
-            mutations.add(re.sub(r"(\d+)", lambda m: str(int(m.group(1)) + 1), path))
-            mutations.add(re.sub(r"(\d+)", lambda m: str(max(0, int(m.group(1)) - 1)), path))
-        except Exception:
+            mutations.add(_NUMBER_RE.sub(_increment_number, path))
+            mutations.add(_NUMBER_RE.sub(_decrement_number, path))
+        except ValueError:
             pass
-        
-        # 3. Common backup extensions
-        mutations.add(path + ".bak")
-        mutations.add(path + ".old")
-        mutations.add(path + "~")
-        mutations.add(path + ".swp")
-        mutations.add(path + ".tmp")
-        
+
+        # 4. Swap extension
         if "." in path:
-            # Swap extension
-            try:
-                base, ext = path.rsplit(".", 1)
-                if ext == "php":
-                    mutations.add(f"{base}.phps")
-                    mutations.add(f"{base}.php.bak")
-                    mutations.add(f"{base}.php.old")
-                elif ext == "jsp":
-                    mutations.add(f"{base}.jsp.bak")
-                    mutations.add(f"{base}.jspx")
-                elif ext == "asp":
-                    mutations.add(f"{base}.aspx")
-                elif ext == "aspx":
-                    mutations.add(f"{base}.asp")
-            except ValueError:
-                pass
-        
-        # 4. Environment/Debug
+            base, ext = path.rsplit(".", 1)
+            mutations.update(f"{base}.{new_ext}" for new_ext in _EXT_MAP.get(ext, ()))
+
+        # 5. Environment/Debug
         if not path.endswith("/"):
-            mutations.add(path + "/debug")
-            mutations.add(path + "/test")
-            mutations.add(path + "/admin")
-        
-        return {m for m in mutations if m != path}
+            mutations.update(path + suffix for suffix in _DIR_SUFFIXES)
+
+        # Substitutions leave the path unchanged when it has no digits
+        mutations.discard(path)
+        return mutations
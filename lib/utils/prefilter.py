@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#  Author: Mauro Soria
+
+from __future__ import annotations
+
+import threading
+
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+
+class Prefilter:
+    """
+    Scan a text once for several regular expressions with Hyperscan.
+
+    Patterns are compiled in prefilter mode, so a pattern that matches with
+    `re` is always reported, but a reported pattern still has to be confirmed
+    with `re` (which also gives the match itself). As with `re` on str
+    patterns, character classes, word boundaries and caseless matching follow
+    Unicode, not only ASCII.
+    """
+
+    FLAGS = (
+        hyperscan.HS_FLAG_CASELESS
+        | hyperscan.HS_FLAG_SINGLEMATCH
+        | hyperscan.HS_FLAG_UTF8
+        | hyperscan.HS_FLAG_UCP
+        | hyperscan.HS_FLAG_PREFILTER
+    ) if hyperscan else 0
+
+    def __init__(self, patterns: list[str]) -> None:
+        self._database = hyperscan.Database()
+        self._database.compile(
+            expressions=[pattern.encode() for pattern in patterns],
+            ids=list(range(len(patterns))),
+            elements=len(patterns),
+            flags=self.FLAGS,
+        )
+        # Scratch space can't be shared by threads scanning at the same time
+        self._local = threading.local()
+
+    def scan(self, text: str) -> set[int]:
+        """Indexes of the patterns that might match the text"""
+
+        if (scratch := getattr(self._local, "scratch", None)) is None:
+            scratch = self._local.scratch = hyperscan.Scratch(self._database)
+
+        hits: set[int] = set()
+        self._database.scan(
+            text.encode(),
+            match_event_handler=lambda id_, start, end, flags, context: hits.add(id_),
+            scratch=scratch,
+        )
+
+        return hits
+
+
+def build_prefilter(patterns: list[str]) -> Prefilter | None:
+    if hyperscan is None or not patterns:
+        return None
+
+    try:
+        return Prefilter(patterns)
+    except hyperscan.error:
+        # Syntax that Hyperscan doesn't support, `re` is used alone
+        return None
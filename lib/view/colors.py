@@ -46,7 +46,9 @@ FORE_COLORS = {
 STYLES = {
     "bright": Style.BRIGHT,
     "dim": Style.DIM,
-    "normal": ""
+    "normal": "",
+    # Appended by set_color(), removed with the other styles
+    "reset": Style.RESET_ALL,
 }
 
 # Credit: https://stackoverflow.com/a/14693789
@@ -64,9 +66,16 @@ def disable_color():
             table[color] = table["none"]
 
 
+def sgr(*codes):
+    """Merge SGR escape sequences (like Fore.RED and Style.BRIGHT) into one"""
+
+    params = ";".join(code[2:-1] for code in codes if code)
+    return f"\x1b[{params}m" if params else ""
+
+
 def set_color(msg, fore="none", back="none", style="normal"):
-    msg = STYLES[style] + FORE_COLORS[fore] + BACK_COLORS[back] + msg
-    return msg + Style.RESET_ALL
+    msg = sgr(STYLES[style], FORE_COLORS[fore], BACK_COLORS[back]) + msg
+    return msg + STYLES["reset"]
 
 
 def clean_color(msg):
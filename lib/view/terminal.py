@@ -16,14 +16,24 @@
 #
 #  Author: Mauro Soria
 
+import atexit
+import re
 import sys
 import shutil
+import threading
+import time
+from functools import lru_cache
 
-from colorama import Fore, Style
+from colorama import Fore, Style, deinit
 from lib.core.data import options
 from lib.core.decorators import locked
-from lib.core.settings import IS_WINDOWS
-from lib.view.colors import set_color, clean_color, disable_color
+from lib.core.settings import (
+    IS_WINDOWS,
+    OUTPUT_BUFFER_SIZE,
+    PROGRESS_REFRESH_INTERVAL,
+    TERMINAL_WIDTH_TTL,
+)
+from lib.view.colors import set_color, clean_color, disable_color, sgr
 
 if IS_WINDOWS:
     from colorama.win32 import (
@@ -32,137 +42,347 @@ if IS_WINDOWS:
         STDOUT,
     )
 
+    try:
+        from colorama.winterm import enable_vt_processing
+    except ImportError:  # colorama < 0.4.6
+        enable_vt_processing = None
+
+# Erase the current line and move the cursor back to its start
+ERASE_SEQUENCE = "\033[1K\033[0G"
+# Same for Windows consoles with VT processing, colorama translates it there
+WINDOWS_ERASE_SEQUENCE = "\r\033[2K"
+
+# Colors of the result rows, bound once instead of looked up on colorama's
+# classes every time
+_RESET = Style.RESET_ALL
+_BRIGHT = Style.BRIGHT
+_DIM = Style.DIM
+_BLACK = Fore.BLACK
+_RED = Fore.RED
+_GREEN = Fore.GREEN
+_YELLOW = Fore.YELLOW
+_CYAN = Fore.CYAN
+_WHITE = Fore.WHITE
+
+# Pipe Color (Dark Grey / Bright Black)
+_PIPE = sgr(_BLACK, _BRIGHT) + " | " + _RESET
+
+# Result rows: time, the middle columns and the URL, and every column
+# when colors are disabled
+_ROW_TEMPLATE = "%-8s" + _PIPE + "%s" + _PIPE + "%s"
+_MID_TEMPLATE = "%s" + _PIPE + "%s" + _PIPE + "%-8s" + _PIPE + "%-22s"
+_PLAIN_ROW_TEMPLATE = "%-8s | %-4s | %-4s | %-8s | %-22s | %s"
+
+# Type codes and colors of the status classes (4 stands for every error)
+_STATUS_TYPES = {2: "OK ", 3: "RED", 4: "ERR"}
+_STATUS_COLORS = {2: _GREEN, 3: _YELLOW, 4: _RED}
+
+_TYPE_COLORS = {
+    "OK ": sgr(_GREEN, _BRIGHT),
+    "RED": _YELLOW,
+    "ERR": _RED,
+    "WAF": sgr(_RED, _BRIGHT),
+    "APP": sgr(_CYAN, _BRIGHT),
+    "SYS": sgr(_WHITE, _DIM),
+    "UNK": _WHITE,
+}
+# The colored type column, the same for every row of a type
+_TYPE_CELLS = {code: color + f"{code:<4}" + _RESET for code, color in _TYPE_COLORS.items()}
+
+# Sources of responses from the infrastructure rather than the application
+_SYS_SOURCE = re.compile(r"Server|Nginx|Apache|IIS|Cloudflare|AWS|Infrastructure").search
+
+# Options shown by CLI.config() as "YES" when enabled
+_BOOL_FLAGS = (
+    ("async_mode", "--async"),
+    ("crawl", "--crawl"),
+    ("full_url", "--full-url"),
+    ("no_wildcard", "--no-wildcard"),
+    ("exit_on_error", "--exit-on-error"),
+    ("follow_redirects", "--follow-redirects"),
+    ("calibration", "--calibration"),
+    ("mutation", "--mutation"),
+    ("uppercase", "--uppercase"),
+    ("lowercase", "--lowercase"),
+    ("capital", "--capital"),
+    ("force_extensions", "--force-extensions"),
+    ("overwrite_extensions", "--overwrite-extensions"),
+    ("remove_extensions", "--remove-extensions"),
+    ("redirects_history", "--redirects-history"),
+    ("stdin_urls", "--stdin"),
+)
+
+# Options shown by CLI.config() with their value when set
+_VALUE_FLAGS = (
+    ("user_agent", "User-Agent"),
+    ("cookie", "Cookie"),
+    ("auth", "Auth"),
+    ("auth_type", "Auth-Type"),
+    ("delay", "Delay"),
+    ("timeout", "Timeout"),
+    ("ip", "IP"),
+    ("max_rate", "Max-Rate"),
+    ("retries", "Retries"),
+    ("subdirs", "Subdirs"),
+    ("exclude_subdirs", "Ex-Subdirs"),
+    ("skip_on_status", "Skip-Status"),
+    ("data", "Data"),
+    ("cidr", "CIDR"),
+    ("minimum_response_size", "Min-Size"),
+    ("maximum_response_size", "Max-Size"),
+    ("max_time", "Max-Time"),
+    ("urls_file", "URLs File"),
+    ("raw_file", "Raw File"),
+    ("nmap_report", "Nmap Report"),
+    ("session_file", "Session File"),
+    ("exclude_extensions", "Exclude Exts"),
+    ("exclude_redirect", "Exclude Redirect"),
+    ("exclude_response", "Exclude Response"),
+    ("target_max_time", "Target Max-Time"),
+    ("data_file", "Data File"),
+    ("headers_file", "Headers File"),
+    ("cert_file", "Cert File"),
+    ("key_file", "Key File"),
+    ("proxy_auth", "Proxy Auth"),
+    ("replay_proxy", "Replay Proxy"),
+    ("scheme", "Scheme"),
+    ("network_interface", "Interface"),
+    ("output_formats", "Formats"),
+    ("mysql_url", "MySQL URL"),
+    ("postgres_url", "Postgres URL"),
+    ("log_file", "Log File"),
+)
+
+_PROGRESS_TEMPLATE = (
+    "[{task}] {percentage:>2}% {progress:>12} {rate:>9}/s       {jobs:<21} {errors}"
+)
+
+
+class _BufferedWriter:
+    """Hold writes to a stream until OUTPUT_BUFFER_SIZE characters are
+    pending or flush() is called"""
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._parts = []
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def write(self, string):
+        with self._lock:
+            self._parts.append(string)
+            self._pending += len(string)
+            if self._pending < OUTPUT_BUFFER_SIZE:
+                return
+
+        self.flush()
+
+    def flush(self):
+        with self._lock:
+            if self._parts:
+                self._stream.write("".join(self._parts))
+                self._parts.clear()
+                self._pending = 0
+
+            self._stream.flush()
+
+
+# One writer per stream, so output of interfaces sharing a stream doesn't
+# get reordered
+_writers = {}
+
+
+def _get_writer(stream):
+    if stream not in _writers:
+        _writers[stream] = _BufferedWriter(stream)
+        atexit.register(_writers[stream].flush)
+
+    return _writers[stream]
+
 
 class CLI:
     def __init__(self):
         self.last_in_line = False
-        self.buffer = ""
+        # Joined only when read, += on a growing string copies it every time
+        self.buffer_parts = []
+        self._last_render = 0.0
+        self._last_state = None
+        self._width = 0
+        self._width_time = 0.0
+
+        self._isatty = sys.stdout.isatty()
+
+        # Piped or redirected output goes through a large buffer that is
+        # only flushed when full, for errors, before each scan and at exit
+        self._out = sys.stdout if self._isatty else _get_writer(sys.stdout)
+
+        # Terminals are erased with an escape sequence, except legacy Windows
+        # consoles that only support the console API (None)
+        if not self._isatty:
+            self._erase_sequence = None
+        elif not IS_WINDOWS:
+            self._erase_sequence = ERASE_SEQUENCE
+        elif self._enable_vt_processing():
+            self._erase_sequence = WINDOWS_ERASE_SEQUENCE
+        else:
+            self._erase_sequence = None
+
+        # Colors are useless when the output isn't a terminal, rows are
+        # formatted without them and set_color() returns plain text
+        self._colored = self._isatty and options.color
 
-        if not options.color:
+        if not self._colored:
             disable_color()
+            self.print_row = self._print_row_plain
+
+        # Built once colors are set up, they never change after that
+        self._arrow = set_color("->", fore="yellow", style="bright")
+        self._history_arrow = set_color("-->", fore="yellow", style="bright")
+        self._task_char = set_color("#", fore="cyan", style="bright")
+        # Every state of the progress bar, one per 5%
+        self._bars = [self._task_char * n + " " * (20 - n) for n in range(21)]
+        self._job_label = set_color("job", fore="green", style="bright")
+        self._errors_label = set_color("errors", fore="red", style="bright")
+        # Visible lengths, used to size the progress bar without building it
+        self._job_label_len = len(clean_color(self._job_label))
+        self._errors_label_len = len(clean_color(self._errors_label))
 
     @staticmethod
-    def erase():
-        if IS_WINDOWS:
+    def _enable_vt_processing():
+        if enable_vt_processing is None:
+            return False
+
+        try:
+            return enable_vt_processing(sys.__stdout__.fileno())
+        except (AttributeError, OSError, ValueError):
+            return False
+
+    def erase(self):
+        if not self._isatty:
+            # Nothing to erase in a file or a pipe
+            return
+
+        if self._erase_sequence is None:
             csbi = GetConsoleScreenBufferInfo()
             line = "\b" * int(csbi.dwCursorPosition.X)
-            sys.stdout.write(line)
+            self._out.write(line)
             width = csbi.dwCursorPosition.X
             csbi.dwCursorPosition.X = 0
             FillConsoleOutputCharacter(STDOUT, " ", width, csbi.dwCursorPosition)
-            sys.stdout.write(line)
-            sys.stdout.flush()
+            self._out.write(line)
+            self._out.flush()
 
         else:
-            sys.stdout.write("\033[1K")
-            sys.stdout.write("\033[0G")
+            self._out.write(self._erase_sequence)
 
     @locked
     def in_line(self, string):
-        self.erase()
-        sys.stdout.write(string)
-        sys.stdout.flush()
+        if self._erase_sequence is None:
+            self.erase()
+        else:
+            string = self._erase_sequence + string
+
+        self._out.write(string)
+        self._out.flush()
         self.last_in_line = True
 
     @locked
     def new_line(self, string="", do_save=True):
-        if self.last_in_line:
-            self.erase()
-
-        if IS_WINDOWS:
-            sys.stdout.write(string)
-            sys.stdout.flush()
-            sys.stdout.write("\n")
-            sys.stdout.flush()
-
+        # The erase sequence, the line and the line break are written at
+        # once, legacy Windows consoles are erased through the console API
+        if self.last_in_line and self._erase_sequence:
+            self._out.write(self._erase_sequence + string + "\n")
         else:
-            sys.stdout.write(string + "\n")
+            if self.last_in_line:
+                self.erase()
+            self._out.write(string + "\n")
 
-        sys.stdout.flush()
+        if self._isatty:
+            self._out.flush()
         self.last_in_line = False
-        sys.stdout.flush()
 
         if do_save:
-            self.buffer += string
-            self.buffer += "\n"
+            self.buffer_parts.append(string + "\n")
+
+    @property
+    def buffer(self):
+        return "".join(self.buffer_parts)
 
     def get_type_color(self, waf_result, status):
         source = waf_result.get("source", "Unknown")
-        
-        # Default
-        code = "UNK"
-        color = Fore.WHITE
-        
-        if 200 <= status < 300:
-            code = "OK "
-            color = Fore.GREEN + Style.BRIGHT
-        elif 300 <= status < 400:
-            code = "RED"
-            color = Fore.YELLOW
-        elif status >= 400:
-            code = "ERR"
-            color = Fore.RED
-            
-        # Override based on WAF/Server detection
-        if "WAF" in source and "App Logic" not in source:
-            code = "WAF"
-            color = Fore.RED + Style.BRIGHT
-        elif "App Logic" in source:
+
+        # Override based on WAF/Server detection (application logic wins
+        # over a WAF)
+        if "App Logic" in source:
             code = "APP"
-            color = Fore.CYAN + Style.BRIGHT
-        elif any(x in source for x in ["Server", "Nginx", "Apache", "IIS", "Cloudflare", "AWS", "Infrastructure"]):
+        elif "WAF" in source:
+            code = "WAF"
+        elif _SYS_SOURCE(source):
             code = "SYS"
-            color = Fore.WHITE + Style.DIM
-            
-        return code, color
+        else:
+            code = _STATUS_TYPES.get(min(status // 100, 4), "UNK")
+
+        return code, _TYPE_COLORS[code]
+
+    @staticmethod
+    @lru_cache(maxsize=512)
+    def _format_mid(status_code, type_code, size_str, source_str):
+        # Most responses share these columns, so they are formatted once
+        c_code = f"{str(status_code):<4}"
+        if code_color := _STATUS_COLORS.get(min(status_code // 100, 4)):
+            c_code = code_color + c_code + _RESET
+
+        return _MID_TEMPLATE % (c_code, _TYPE_CELLS[type_code], size_str, source_str)
 
     def print_row(self, response, waf_result, full_url):
         time_str = response.datetime.split()[1]
         status_code = response.status
-        size_str = response.size
-        
-        type_code, type_color = self.get_type_color(waf_result, status_code)
-        
+
+        type_code, _ = self.get_type_color(waf_result, status_code)
+
         source_str = waf_result.get("source", "")
         if source_str == "Unknown":
             source_str = ""
-            
+
         url_str = response.url if full_url else "/" + response.full_path
-        
+
         # Append redirect info if present with colored arrow
         if response.redirect:
-            arrow = set_color("->", fore="yellow", style="bright")
-            url_str += f" {arrow} {response.redirect}"
-        
-        # Pipe Color (Dark Grey / Bright Black)
-        PIPE = Fore.BLACK + Style.BRIGHT + " | " + Style.RESET_ALL
-        
-        # Formatting (Fixed Widths)
-        c_time = f"{time_str:<8}"
-        c_code = f"{str(status_code):<4}"
-        c_type = f"{type_code:<4}"
-        c_size = f"{size_str:<8}"
-        c_source = f"{source_str:<22}"
-        c_url = f"{url_str}"
-        
-        # Apply Colors to Content
-        if 200 <= status_code < 300:
-            c_code = Fore.GREEN + c_code + Style.RESET_ALL
-        elif 300 <= status_code < 400:
-            c_code = Fore.YELLOW + c_code + Style.RESET_ALL
-        elif status_code >= 400:
-            c_code = Fore.RED + c_code + Style.RESET_ALL
-            
-        c_type = type_color + c_type + Style.RESET_ALL
-        
+            url_str += f" {self._arrow} {response.redirect}"
+
         # Construct the Row
-        row = f"{c_time}{PIPE}{c_code}{PIPE}{c_type}{PIPE}{c_size}{PIPE}{c_source}{PIPE}{c_url}"
-        self.new_line(row)
-        
-        # Print history (redirect chain) on new lines if needed
-        for redirect in response.history:
-            arrow = set_color("-->", fore="yellow", style="bright")
-            self.new_line(f"{arrow} {redirect}")
+        mid = self._format_mid(status_code, type_code, response.size, source_str)
+        lines = [_ROW_TEMPLATE % (time_str, mid, url_str)]
+
+        # Print history (redirect chain) on new lines if needed, everything
+        # is written at once
+        lines.extend(f"{self._history_arrow} {redirect}" for redirect in response.history)
+
+        self.new_line("\n".join(lines))
+
+    def _print_row_plain(self, response, waf_result, full_url):
+        source_str = waf_result.get("source", "")
+        if source_str == "Unknown":
+            source_str = ""
+
+        url_str = response.url if full_url else "/" + response.full_path
+        if response.redirect:
+            url_str += f" -> {response.redirect}"
+
+        type_code, _ = self.get_type_color(waf_result, response.status)
+        lines = [
+            _PLAIN_ROW_TEMPLATE % (
+                response.datetime.split()[1],
+                response.status,
+                type_code,
+                response.size,
+                source_str,
+                url_str,
+            )
+        ]
+        lines.extend(f"--> {redirect}" for redirect in response.history)
+
+        self.new_line("\n".join(lines))
 
     def status_report(self, response, full_url, waf_result=None):
         if waf_result is None:
@@ -172,27 +392,58 @@ class CLI:
              
         self.print_row(response, waf_result, full_url)
 
-    def last_path(self, index, length, current_job, all_jobs, rate, errors):
-        percentage = int(index / length * 100) if length > 0 else 0
-        task = set_color("#", fore="cyan", style="bright") * int(percentage / 5)
-        task += " " * (20 - int(percentage / 5))
-        progress = f"{index}/{length}"
+    def get_width(self):
+        # Getting the terminal size is a system call, it's refreshed now and then
+        now = time.monotonic()
+        if now - self._width_time >= TERMINAL_WIDTH_TTL:
+            self._width = shutil.get_terminal_size()[0]
+            self._width_time = now
 
-        grean_job = set_color("job", fore="green", style="bright")
-        jobs = f"{grean_job}:{current_job}/{all_jobs}"
+        return self._width
 
-        red_error = set_color("errors", fore="red", style="bright")
-        errors = f"{red_error}:{errors}"
+    def last_path(self, index, length, current_job, all_jobs, rate, errors):
+        # The progress bar is redrawn at a limited rate and only when it
+        # changed, unless a new line has just erased it
+        now = time.monotonic()
+        state = (index, length, current_job, all_jobs, rate, errors)
+        if self.last_in_line and (
+            state == self._last_state
+            or now - self._last_render < PROGRESS_REFRESH_INTERVAL
+        ):
+            return
 
-        progress_bar = f"[{task}] {str(percentage).rjust(2, chr(32))}% "
-        progress_bar += f"{progress.rjust(12, chr(32))} "
-        progress_bar += f"{str(rate).rjust(9, chr(32))}/s       "
-        progress_bar += f"{jobs.ljust(21, chr(32))} {errors}"
+        self._last_render = now
+        self._last_state = state
 
-        if len(clean_color(progress_bar)) >= shutil.get_terminal_size()[0]:
+        percentage = int(index / length * 100) if length > 0 else 0
+        progress = f"{index}/{length}"
+        jobs = f"{self._job_label}:{current_job}/{all_jobs}"
+        errors = f"{self._errors_label}:{errors}"
+
+        # Visible length of the bar, the jobs column is padded including
+        # its color codes
+        visible_length = (
+            36
+            + max(len(str(percentage)), 2)
+            + max(len(progress), 12)
+            + max(len(str(rate)), 9)
+            + len(jobs) - len(self._job_label) + self._job_label_len
+            + max(21 - len(jobs), 0)
+            + len(errors) - len(self._errors_label) + self._errors_label_len
+        )
+        if visible_length >= self.get_width():
             return
 
-        self.in_line(progress_bar)
+        self.in_line(
+            _PROGRESS_TEMPLATE.format(
+                task=self._bars[min(int(percentage / 5), 20)],
+                percentage=percentage,
+                progress=progress,
+                rate=rate,
+                jobs=jobs,
+                errors=errors,
+            )
+        )
 
     def new_directories(self, directories):
         message = set_color(
@@ -200,9 +451,14 @@ class CLI:
         )
         self.new_line(message)
 
+    def flush(self):
+        # Called before anything else may write to the stream directly
+        self._out.flush()
+
     def error(self, reason):
         message = set_color(reason, fore="white", back="red", style="bright")
         self.new_line("\n" + message)
+        self._out.flush()
 
     def warning(self, message, do_save=True):
         message = set_color(message, fore="yellow", style="bright")
@@ -311,71 +567,12 @@ class CLI:
              config["--random-agent"] = "YES"
 
         # Dynamic Boolean Flags
-        bool_flags = {
-            "async_mode": "--async",
-            "crawl": "--crawl",
-            "full_url": "--full-url",
-            "no_wildcard": "--no-wildcard",
-            "exit_on_error": "--exit-on-error",
-            "follow_redirects": "--follow-redirects",
-            "calibration": "--calibration",
-            "mutation": "--mutation",
-            "uppercase": "--uppercase",
-            "lowercase": "--lowercase",
-            "capital": "--capital",
-            "force_extensions": "--force-extensions",
-            "overwrite_extensions": "--overwrite-extensions",
-            "remove_extensions": "--remove-extensions",
-            "redirects_history": "--redirects-history",
-            "stdin_urls": "--stdin",
-        }
-        
-        for key, label in bool_flags.items():
+        for key, label in _BOOL_FLAGS:
             if getattr(options, key, False):
                 config[label] = "YES"
 
         # Dynamic Value Flags
-        value_flags = {
-            "user_agent": "User-Agent",
-            "cookie": "Cookie",
-            "auth": "Auth",
-            "auth_type": "Auth-Type",
-            "delay": "Delay",
-            "timeout": "Timeout",
-            "ip": "IP",
-            "max_rate": "Max-Rate",
-            "retries": "Retries",
-            "subdirs": "Subdirs",
-            "exclude_subdirs": "Ex-Subdirs",
-            "skip_on_status": "Skip-Status",
-            "data": "Data",
-            "cidr": "CIDR",
-            "minimum_response_size": "Min-Size",
-            "maximum_response_size": "Max-Size",
-            "max_time": "Max-Time",
-            "urls_file": "URLs File",
-            "raw_file": "Raw File",
-            "nmap_report": "Nmap Report",
-            "session_file": "Session File",
-            "exclude_extensions": "Exclude Exts",
-            "exclude_redirect": "Exclude Redirect",
-            "exclude_response": "Exclude Response",
-            "target_max_time": "Target Max-Time",
-            "data_file": "Data File",
-            "headers_file": "Headers File",
-            "cert_file": "Cert File",
-            "key_file": "Key File",
-            "proxy_auth": "Proxy Auth",
-            "replay_proxy": "Replay Proxy",
-            "scheme": "Scheme",
-            "network_interface": "Interface",
-            "output_formats": "Formats",
-            "mysql_url": "MySQL URL",
-            "postgres_url": "Postgres URL",
-            "log_file": "Log File",
-        }
-
-        for key, label in value_flags.items():
+        for key, label in _VALUE_FLAGS:
             val = getattr(options, key, None)
             if val:
                 if isinstance(val, list):
@@ -400,8 +597,8 @@ class CLI:
 
 
 class QuietCLI(CLI):
-    def status_report(self, response, full_url):
-        super().status_report(response, True)
+    def status_report(self, response, full_url, waf_result=None):
+        super().status_report(response, True, waf_result)
 
     def last_path(*args):
         pass
@@ -433,4 +630,17 @@ class EmptyCLI(QuietCLI):
         pass
 
 
-interface = EmptyCLI() if options.disable_cli else QuietCLI() if options.quiet else CLI()
+def make_interface():
+    if not options.color:
+        # No escape codes will be written, so unhook colorama's wrappers of
+        # sys.stdout and sys.stderr that parse every write for them
+        deinit()
+
+    if options.disable_cli:
+        return EmptyCLI()
+    if options.quiet:
+        return QuietCLI()
+    return CLI()
+
+
+interface = make_interface()
@@ -0,0 +1,39 @@
+import unittest
+from lib.utils.common import _first_length, get_readable_size, get_readable_size_range, is_binary
+
+class TestReadableSizeRange(unittest.TestCase):
+    def test_first_length(self):
+        for threshold in (0, 1, 1023, 1024, 2 ** 40):
+            with self.subTest(threshold=threshold):
+                self.assertEqual(_first_length(lambda num: num >= threshold), threshold)
+
+    def test_boundaries(self):
+        for size in ("0B", "1B", "1023B", "1KB", "2KB", "3KB", "1023KB", "1MB", "5MB", "1GB"):
+            with self.subTest(size=size):
+                start, end = get_readable_size_range(size)
+                self.assertEqual(get_readable_size(start), size)
+                self.assertEqual(get_readable_size(end - 1), size)
+                self.assertNotEqual(get_readable_size(end), size)
+                if start:
+                    self.assertNotEqual(get_readable_size(start - 1), size)
+
+    def test_sizes_never_formatted(self):
+        for size in ("", "abc", "12XB", "1.5KB", "1024B"):
+            with self.subTest(size=size):
+                self.assertIsNone(get_readable_size_range(size))
+
+class TestIsBinary(unittest.TestCase):
+    def test_is_binary(self):
+        for data, expected in (
+            (b"", False),
+            (b"<html>\r\n\t\x1b[0m</html>", False),
+            ("héllo".encode(), False),
+            (b"text\x00", True),
+            (b"\x7f", True),
+            (bytearray(b"\x01\x02"), True),
+        ):
+            with self.subTest(data=data):
+                self.assertEqual(is_binary(data), expected)
+
+if __name__ == '__main__':
+    unittest.main()
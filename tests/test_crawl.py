@@ -0,0 +1,59 @@
+import unittest
+from unittest.mock import patch
+from lib.utils import crawl
+from lib.utils.crawl import Crawler
+
+URL = "http://example.com/dir/page.html"
+SCOPE = "http://example.com/"
+HTML = """<?xml version="1.0"?>
+<html><head><script src="/static/app.js"></script></head>
+<body>
+<a href="admin/">Admin</a>
+<a href="http://example.com/login.php?next=1">Login</a>
+<a href="https://other.com/x">Other</a>
+<a href="mailto:admin@example.com">Mail</a>
+<img src="logo.png">
+<a href="#top">Top</a>
+</body></html>"""
+HTML_LINKS = {"static/app.js", "dir/admin/", "login.php?next=1"}
+JS = """
+fetch("/api/v1/users");
+import x from "lib/util/helpers";
+var type = "text/html";
+load("config.json");
+location = "http://example.com/account/settings";
+"""
+
+class TestCrawler(unittest.TestCase):
+    def test_html_with_bs4(self):
+        with patch.object(crawl, "HAS_LXML", False):
+            self.assertEqual(Crawler.html_crawl(URL, SCOPE, HTML), HTML_LINKS)
+
+    def test_html_without_parser(self):
+        with patch.object(crawl, "HAS_LXML", False), patch.object(crawl, "HAS_BS4", False):
+            self.assertEqual(Crawler.html_crawl(URL, SCOPE, HTML), HTML_LINKS)
+
+    @unittest.skipUnless(crawl.HAS_LXML, "lxml is not installed")
+    def test_html_with_lxml(self):
+        self.assertEqual(Crawler.html_crawl(URL, SCOPE, HTML), HTML_LINKS)
+        self.assertEqual(Crawler.html_crawl(URL, SCOPE, ""), set())
+
+    def test_js_without_prefilter(self):
+        with patch.object(crawl, "_JS_PREFILTER", None):
+            links = Crawler.js_crawl(URL, SCOPE, JS)
+
+        self.assertIn("api/v1/users", links)
+        self.assertIn("lib/util/helpers", links)
+        self.assertIn("config.json", links)
+        self.assertIn("account/settings", links)
+        self.assertNotIn("text/html", links)
+
+    @unittest.skipUnless(crawl._JS_PREFILTER, "hyperscan is not installed")
+    def test_js_with_prefilter(self):
+        with patch.object(crawl, "_JS_PREFILTER", None):
+            expected = Crawler.js_crawl(URL, SCOPE, JS)
+
+        self.assertEqual(Crawler.js_crawl(URL, SCOPE, JS), expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,15 +1,24 @@
 import unittest
 import tempfile
 import os
+from unittest.mock import patch
+from lib.core import dictionary as dictionary_module
 from lib.core.dictionary import Dictionary
 from lib.core.data import options
 
 class TestDictionary(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # The wordlist is the same for every test, it's only read
+        cls.test_file = tempfile.NamedTemporaryFile(delete=False, mode='w')
+        cls.test_file.write("admin\nuser\n%EXT%\n")
+        cls.test_file.close()
+
+    @classmethod
+    def tearDownClass(cls):
+        os.unlink(cls.test_file.name)
+
     def setUp(self):
-        self.test_file = tempfile.NamedTemporaryFile(delete=False, mode='w')
-        self.test_file.write("admin\nuser\n%EXT%\n")
-        self.test_file.close()
-        
         # Reset options
         options.extensions = ("php", "html")
         options.prefixes = ()
@@ -21,9 +30,6 @@ class TestDictionary(unittest.TestCase):
         options.overwrite_extensions = False
         options.exclude_extensions = ()
 
-    def tearDown(self):
-        os.unlink(self.test_file.name)
-
     def test_generate_basic(self):
         dictionary = Dictionary(files=[self.test_file.name])
         items = list(dictionary)
@@ -54,5 +60,57 @@ class TestDictionary(unittest.TestCase):
         self.assertIn("pre_admin", items)
         self.assertIn("admin_suf", items)
 
+class TestDictionaryOptionalModules(unittest.TestCase):
+    lines = ["admin", "api/", "/double", "user", "admin", "café"]
+
+    @classmethod
+    def setUpClass(cls):
+        cls.test_file = tempfile.NamedTemporaryFile(delete=False, mode='w', encoding='utf-8')
+        cls.test_file.write("  admin \n\n# comment\n/api/\n//double\nuser\nadmin\ncafé\n")
+        cls.test_file.close()
+
+    @classmethod
+    def tearDownClass(cls):
+        os.unlink(cls.test_file.name)
+
+    def setUp(self):
+        options.extensions = ()
+        options.prefixes = ()
+        options.suffixes = ()
+        options.lowercase = False
+        options.uppercase = False
+        options.capitalization = False
+        options.force_extensions = False
+        options.overwrite_extensions = False
+        options.exclude_extensions = ()
+
+    def test_read_lines_without_pyarrow(self):
+        with patch.object(dictionary_module, "pa", None):
+            self.assertEqual(list(Dictionary.read_lines(self.test_file.name)), self.lines)
+
+    @unittest.skipUnless(dictionary_module.pa, "pyarrow is not installed")
+    def test_read_lines_with_pyarrow(self):
+        self.assertEqual(list(Dictionary.read_lines(self.test_file.name)), self.lines)
+
+    def test_deduplication_without_xxhash(self):
+        expected = ["admin", "api/", "/double", "user", "café"]
+        with patch.object(dictionary_module, "fingerprint", hash):
+            self.assertEqual(list(Dictionary(files=[self.test_file.name])), expected)
+
+        self.assertEqual(list(Dictionary(files=[self.test_file.name])), expected)
+
+    def test_excluded_extensions(self):
+        options.exclude_extensions = ("php", "asp", "jsp", "bak", "old", "swp")
+        paths = ["index.php", "index.php5", "a.bak", "photo.jpg", "old", "x.swp", "x.jsp/"]
+        expected = [True, False, True, False, False, True, False]
+
+        with patch.object(dictionary_module, "ahocorasick", None):
+            dictionary = Dictionary()
+            self.assertIsNone(dictionary._exclude_ext_automaton)
+            self.assertEqual(list(map(dictionary.has_excluded_extension, paths)), expected)
+
+        dictionary = Dictionary()
+        self.assertEqual(list(map(dictionary.has_excluded_extension, paths)), expected)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,219 @@
+import asyncio
+import random
+import threading
+import unittest
+from collections import Counter
+from unittest.mock import MagicMock, patch
+from lib.core import fuzzer
+from lib.core.dictionary import Dictionary
+from lib.core.fuzzer import AsyncFuzzer, Fuzzer
+
+def random_strings(rng, count, length):
+    return {"".join(rng.choice("ab./") for _ in range(rng.randint(1, length))) for _ in range(count)}
+
+class TestScannerTrie(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(0)
+        # Scanners are only compared, any object will do
+        self.fuzzer = Fuzzer.__new__(Fuzzer)
+        self.fuzzer.scanners = {
+            "default": {"index": "default"},
+            "prefixes": {key: f"prefix {key}" for key in random_strings(rng, 40, 4)},
+            "suffixes": {key: f"suffix {key}" for key in random_strings(rng, 40, 4)},
+        }
+        self.paths = random_strings(rng, 500, 8) | {"", "/"}
+
+    def get_scanners(self, use_trie):
+        self.fuzzer._prefix_trie = self.fuzzer._suffix_trie = None
+        if use_trie:
+            self.fuzzer._prefix_trie = Fuzzer.build_trie(self.fuzzer.scanners["prefixes"])
+            self.fuzzer._suffix_trie = Fuzzer.build_trie(self.fuzzer.scanners["suffixes"], reverse=True)
+
+        return {path: Counter(self.fuzzer.get_scanners_for(path)) for path in self.paths}
+
+    def test_trie_matches_linear_lookup(self):
+        self.assertEqual(self.get_scanners(True), self.get_scanners(False))
+
+    def test_setup_tries(self):
+        self.fuzzer.setup_tries()
+        self.assertIsNotNone(self.fuzzer._prefix_trie)
+
+        self.fuzzer.scanners["prefixes"] = {"a": "prefix a"}
+        self.fuzzer.scanners["suffixes"] = {}
+        self.fuzzer.setup_tries()
+        self.assertIsNone(self.fuzzer._prefix_trie)
+
+class TestExcludeTexts(unittest.TestCase):
+    texts = ["Not Found", "Access Denied", "404", "missing page", "oops"]
+    contents = ["", "Page Not Found!", "oop", "Error 404", "nothing", "a missing page"]
+
+    def has_excluded_text(self, automaton):
+        instance = Fuzzer.__new__(Fuzzer)
+        instance._exclude_texts = self.texts
+        instance._exclude_texts_automaton = automaton
+        return [instance.has_excluded_text(content) for content in self.contents]
+
+    def test_without_ahocorasick(self):
+        with patch.object(fuzzer, "ahocorasick", None):
+            self.assertIsNone(Fuzzer.build_texts_automaton(self.texts))
+
+        self.assertEqual(self.has_excluded_text(None), [False, True, False, True, False, True])
+
+    @unittest.skipUnless(fuzzer.ahocorasick, "pyahocorasick is not installed")
+    def test_automaton_matches_linear_search(self):
+        automaton = Fuzzer.build_texts_automaton(self.texts)
+        self.assertIsNotNone(automaton)
+        self.assertEqual(self.has_excluded_text(automaton), self.has_excluded_text(None))
+
+class GatedDictionary(Dictionary):
+    """Hand out the given paths, once the gate is opened"""
+
+    def __init__(self, paths, gate=None):
+        super().__init__()
+        self._extra = list(paths)
+        self.gate = gate
+
+    def next_batch(self, size=1):
+        if self.gate:
+            self.gate.wait()
+        return super().next_batch(size)
+
+    def remaining(self):
+        return self._extra[self._extra_index:]
+
+def make_fuzzer(cls, dictionary, scan, batch_size=1):
+    instance = cls(
+        MagicMock(), dictionary, match_callbacks=(), not_found_callbacks=(), error_callbacks=()
+    )
+    instance.set_base_path("")
+    instance.scan = scan
+    instance.get_batch_size = lambda: batch_size
+    return instance
+
+class TestThreadProc(unittest.TestCase):
+    def start_threads(self, instance, count):
+        instance._threads = [threading.Thread(target=instance.thread_proc, daemon=True) for _ in range(count)]
+        instance.play()
+        for thread in instance._threads:
+            thread.start()
+
+    def stop_threads(self, instance):
+        instance.quit()
+        for thread in instance._threads:
+            thread.join(5)
+            self.assertFalse(thread.is_alive())
+
+    def pause_while_threads_stop(self, paths, scan):
+        gate = threading.Event()
+        instance = make_fuzzer(Fuzzer, GatedDictionary(paths, gate), scan)
+        self.start_threads(instance, 4)
+
+        # Every thread is alive and waiting for paths when the pause starts
+        pauser = threading.Thread(target=instance.pause, daemon=True)
+        pauser.start()
+        while instance._play_event.is_set():
+            pass
+        gate.set()
+
+        pauser.join(5)
+        self.assertFalse(pauser.is_alive(), "pause() never returned")
+        self.stop_threads(instance)
+        return instance
+
+    def test_pause_while_dictionary_runs_out(self):
+        self.pause_while_threads_stop([], lambda path: None)
+
+    def test_pause_after_error(self):
+        def scan(path):
+            raise ValueError(path)
+
+        instance = self.pause_while_threads_stop(["a", "b", "c", "d"], scan)
+        self.assertIsInstance(instance._exc, ValueError)
+
+    def test_pause_gives_the_batch_back(self):
+        paths = [str(i) for i in range(20)]
+        scanned = []
+
+        def scan(path):
+            scanned.append(path)
+            if len(scanned) == 3:
+                instance._play_event.clear()
+
+        dictionary = GatedDictionary(paths)
+        instance = make_fuzzer(Fuzzer, dictionary, scan, batch_size=10)
+        self.start_threads(instance, 1)
+
+        self.assertTrue(instance._pause_semaphore.acquire(timeout=5))
+        self.assertEqual(dictionary.remaining(), paths[3:])
+        self.stop_threads(instance)
+        self.assertEqual(scanned, paths[:3])
+
+    def test_quit_gives_the_batch_back(self):
+        paths = [str(i) for i in range(20)]
+        scanned = []
+
+        def scan(path):
+            scanned.append(path)
+            if len(scanned) == 3:
+                instance._quit_event.set()
+
+        dictionary = GatedDictionary(paths)
+        instance = make_fuzzer(Fuzzer, dictionary, scan, batch_size=10)
+        self.start_threads(instance, 1)
+        instance._threads[0].join(5)
+
+        self.assertEqual(scanned, paths[:3])
+        self.assertEqual(dictionary.remaining(), paths[3:])
+
+class TestTaskProc(unittest.TestCase):
+    def test_cancel_gives_the_batch_back(self):
+        paths = [str(i) for i in range(20)]
+        scanned = []
+
+        async def scan(path):
+            scanned.append(path)
+            if len(scanned) == 3:
+                await asyncio.sleep(60)
+
+        async def run():
+            task = asyncio.create_task(instance.task_proc())
+            while len(scanned) < 3:
+                await asyncio.sleep(0)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        dictionary = GatedDictionary(paths)
+        instance = make_fuzzer(AsyncFuzzer, dictionary, scan, batch_size=10)
+        instance.play()
+        asyncio.run(run())
+
+        # The path being scanned when the task was cancelled is given back too
+        self.assertEqual(dictionary.remaining(), paths[2:])
+
+    def test_pause_gives_the_batch_back(self):
+        paths = [str(i) for i in range(20)]
+        scanned = []
+
+        async def scan(path):
+            scanned.append(path)
+            if len(scanned) == 3:
+                instance.pause()
+
+        async def run():
+            task = asyncio.create_task(instance.task_proc())
+            while len(dictionary.remaining()) != 17:
+                await asyncio.sleep(0)
+            self.assertEqual(dictionary.remaining(), paths[3:])
+            instance.play()
+            await task
+
+        dictionary = GatedDictionary(paths)
+        instance = make_fuzzer(AsyncFuzzer, dictionary, scan, batch_size=10)
+        instance.play()
+        asyncio.run(run())
+
+        self.assertEqual(scanned, paths)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,7 @@
 import unittest
 import threading
 import http.server
+import socket
 import socketserver
 import time
 import requests
@@ -22,21 +23,27 @@ class MockHandler(http.server.SimpleHTTPRequestHandler):
             self.send_response(404)
             self.end_headers()
 
+class MockServer(socketserver.ThreadingTCPServer):
+    # The port may still be in TIME_WAIT from a previous run
+    allow_reuse_address = True
+    daemon_threads = True
+
 class TestIntegration(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
-        cls.server = socketserver.TCPServer(("localhost", PORT), MockHandler)
+        cls.server = MockServer(("localhost", PORT), MockHandler)
         cls.thread = threading.Thread(target=cls.server.serve_forever)
         cls.thread.daemon = True
         cls.thread.start()
-        time.sleep(1) # Wait for server to start
 
-    @classmethod
-    def tearDownClass(cls):
-        cls.server.shutdown()
-        cls.server.server_close()
+        # Wait for server to start
+        for _ in range(50):
+            try:
+                socket.create_connection(("localhost", PORT), timeout=0.05).close()
+                break
+            except OSError:
+                time.sleep(0.02)
 
-    def setUp(self):
         options.timeout = 1
         options.max_retries = 0
         options.proxies = []
@@ -54,19 +61,23 @@ class TestIntegration(unittest.TestCase):
         options.max_rate = 0
         options.thread_count = 1
 
+        # Shared by the tests, so the connection pool is set up only once
+        cls.requester = Requester()
+        cls.requester.set_url(f"http://localhost:{PORT}/")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.requester.session.close()
+        cls.server.shutdown()
+        cls.server.server_close()
+
     def test_requester_hit(self):
-        requester = Requester()
-        requester.set_url(f"http://localhost:{PORT}/")
-        
-        response = requester.request("admin")
+        response = self.requester.request("admin")
         self.assertEqual(response.status, 200)
         self.assertIn("Admin Panel", response.content)
 
     def test_requester_403(self):
-        requester = Requester()
-        requester.set_url(f"http://localhost:{PORT}/")
-        
-        response = requester.request("403")
+        response = self.requester.request("403")
         self.assertEqual(response.status, 403)
 
 if __name__ == '__main__':
@@ -0,0 +1,51 @@
+import re
+import unittest
+from unittest.mock import patch
+from lib.utils import prefilter
+from lib.utils.prefilter import build_prefilter
+
+PATTERNS = [r"admin\d+", r"(?:login|signin)\.php", r"^secret"]
+TEXTS = ["", "ADMIN42", "go to signin.php", "secret file", "not a secret", "admin"]
+
+class TestPrefilter(unittest.TestCase):
+    def test_without_hyperscan(self):
+        with patch.object(prefilter, "hyperscan", None):
+            self.assertIsNone(build_prefilter(PATTERNS))
+
+    def test_without_patterns(self):
+        self.assertIsNone(build_prefilter([]))
+
+    @unittest.skipUnless(prefilter.hyperscan, "hyperscan is not installed")
+    def test_reports_every_match(self):
+        matcher = build_prefilter(PATTERNS)
+        self.assertIsNotNone(matcher)
+
+        for text in TEXTS:
+            with self.subTest(text=text):
+                expected = {
+                    index for index, pattern in enumerate(PATTERNS)
+                    if re.search(pattern, text, re.IGNORECASE)
+                }
+                self.assertLessEqual(expected, matcher.scan(text))
+
+    @unittest.skipUnless(prefilter.hyperscan, "hyperscan is not installed")
+    def test_non_ascii_text(self):
+        patterns = [r"^\w+$", r"\bintrouvable\b", r"\d+\s\w+", r"ÉLÈVE"]
+        matcher = build_prefilter(patterns)
+
+        for text in ["élève", "Page introuvable", "pagé\u00a0introuvable", "٣ élèves", "ÉlÈve"]:
+            with self.subTest(text=text):
+                expected = {
+                    index for index, pattern in enumerate(patterns)
+                    if re.search(pattern, text, re.IGNORECASE)
+                }
+                self.assertTrue(expected)
+                self.assertLessEqual(expected, matcher.scan(text))
+
+    @unittest.skipUnless(prefilter.hyperscan, "hyperscan is not installed")
+    def test_unsupported_pattern(self):
+        # Too large for Hyperscan but fine for `re`, which is used alone then
+        self.assertIsNone(build_prefilter([r"a{70000}"]))
+
+if __name__ == '__main__':
+    unittest.main()
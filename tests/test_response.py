@@ -0,0 +1,85 @@
+import unittest
+from unittest.mock import patch
+from lib.connection import response
+from lib.connection.response import BodyReader, intern_body
+from lib.core.settings import BINARY_CHECK_SIZE
+
+def read(data, chunk_size, headers):
+    reader = BodyReader(headers, "utf-8")
+    for i in range(0, len(data), chunk_size):
+        if reader.feed(data[i:i + chunk_size]):
+            break
+    return reader
+
+class TestBodyReader(unittest.TestCase):
+    def test_text(self):
+        # Multi-byte characters end up split between chunks
+        data = "héllo wörld ".encode() * 1000
+        for headers in ({}, {"content-length": str(len(data))}, {"content-length": "10"}):
+            for chunk_size in (7, BINARY_CHECK_SIZE, len(data)):
+                with self.subTest(headers=headers, chunk_size=chunk_size):
+                    reader = read(data, chunk_size, headers)
+                    self.assertFalse(reader.binary)
+                    self.assertEqual(reader.getvalue(), (b"", data.decode()))
+                    self.assertEqual(reader.length, len(data))
+
+    def test_text_shorter_than_the_check(self):
+        reader = read(b"Not Found", 4, {})
+        self.assertEqual(reader.getvalue(), (b"", "Not Found"))
+
+    def test_binary(self):
+        data = bytes(range(256)) * 100
+        reader = read(data, 1000, {})
+        self.assertTrue(reader.binary)
+        self.assertEqual(reader.getvalue(), (data, ""))
+
+    def test_sized_binary_stops_after_the_check(self):
+        data = bytes(range(256)) * 100
+        reader = read(data, 1000, {"content-length": str(len(data))})
+        self.assertTrue(reader.binary)
+        self.assertGreaterEqual(reader.length, BINARY_CHECK_SIZE)
+        self.assertLess(reader.length, len(data))
+        self.assertEqual(reader.getvalue(), (data[:reader.length], ""))
+
+    def test_only_the_head_is_checked(self):
+        data = b"a" * BINARY_CHECK_SIZE + b"\x00"
+        reader = read(data, 1000, {})
+        self.assertFalse(reader.binary)
+        self.assertEqual(reader.getvalue(), (b"", data.decode()))
+
+    def test_key(self):
+        data = b"<html>" * 1000
+        self.assertEqual(read(data, 7, {}).getkey(), read(data, 1000, {}).getkey())
+        self.assertNotEqual(read(data, 7, {}).getkey(), read(data + b"!", 7, {}).getkey())
+        self.assertNotEqual(
+            read(data, 7, {}).getkey(), BodyReader({}, "latin-1").getkey()
+        )
+
+class TestInternBody(unittest.TestCase):
+    def setUp(self):
+        patcher = patch.multiple(
+            response, _interned_bodies={}, _interned_size=0, BODY_INTERN_MAX_SIZE=100
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_identical_bodies_are_shared(self):
+        first = intern_body("".join(["x"] * 40), (b"1", "utf-8"), 40)
+        second = intern_body("".join(["x"] * 40), (b"1", "utf-8"), 40)
+        self.assertIs(first, second)
+
+    def test_total_size_is_capped(self):
+        for key in (b"1", b"2", b"3"):
+            intern_body("body", (key, "utf-8"), 40)
+
+        # The oldest body is evicted
+        self.assertEqual(list(response._interned_bodies), [(b"2", "utf-8"), (b"3", "utf-8")])
+        self.assertEqual(response._interned_size, 80)
+
+    def test_large_and_empty_bodies_are_not_kept(self):
+        self.assertEqual(intern_body("body", (b"1", "utf-8"), 101), "body")
+        self.assertEqual(intern_body(b"", (b"2", "utf-8"), 0), b"")
+        self.assertEqual(response._interned_bodies, {})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,12 +3,33 @@ from lib.parse.url import clean_path, parse_path
 
 class TestUrlParser(unittest.TestCase):
     def test_clean_path(self):
-        self.assertEqual(clean_path("/admin//dashboard"), "/admin/dashboard")
-        self.assertEqual(clean_path("admin/"), "admin/")
+        # Only the query and the fragment are removed, duplicate slashes
+        # are part of the path being tested
+        for path, expected in (
+            ("/admin//dashboard", "/admin//dashboard"),
+            ("admin/", "admin/"),
+            ("admin?q=1", "admin"),
+            ("admin#top", "admin"),
+            ("admin?q=1#top", "admin"),
+        ):
+            with self.subTest(path=path):
+                self.assertEqual(clean_path(path), expected)
+
+    def test_clean_path_keep_queries(self):
+        self.assertEqual(clean_path("admin?q=1#top", keep_queries=True), "admin?q=1")
+        self.assertEqual(clean_path("admin?q=1#top", keep_fragment=True), "admin")
         
     def test_parse_path(self):
-        self.assertEqual(parse_path("http://example.com/admin"), "/admin")
-        self.assertEqual(parse_path("http://example.com/admin?q=1"), "/admin?q=1")
+        # Paths are returned without the leading slash
+        for url, expected in (
+            ("http://example.com/admin", "admin"),
+            ("http://example.com/admin?q=1", "admin?q=1"),
+            ("http://example.com", ""),
+            ("/admin", "admin"),
+            ("admin", "admin"),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(parse_path(url), expected)
 
 if __name__ == '__main__':
     unittest.main()
@@ -3,31 +3,23 @@ from unittest.mock import MagicMock
 from lib.core.waf import WAF
 
 class TestWAF(unittest.TestCase):
-    def test_cloudflare_detection(self):
-        response = MagicMock()
-        response.headers = {"server": "cloudflare"}
-        response.content = "Attention Required! Cloudflare"
-        
-        result = WAF.analyze(response)
-        self.assertTrue(result["waf_present"])
-        self.assertIn("Cloudflare", result["source"])
+    def test_detection(self):
+        for name, headers, content, source in (
+            ("cloudflare", {"server": "cloudflare"}, "Attention Required! Cloudflare", "Cloudflare"),
+            ("aws", {"x-amzn-errortype": "ForbiddenException"}, "", "AWS"),
+            ("no waf", {"server": "apache"}, "Hello World", None),
+        ):
+            with self.subTest(name):
+                response = MagicMock()
+                response.headers = headers
+                response.content = content
 
-    def test_aws_detection(self):
-        response = MagicMock()
-        response.headers = {"x-amzn-errortype": "ForbiddenException"}
-        response.content = ""
-        
-        result = WAF.analyze(response)
-        self.assertTrue(result["waf_present"])
-        self.assertIn("AWS", result["source"])
-
-    def test_no_waf(self):
-        response = MagicMock()
-        response.headers = {"server": "apache"}
-        response.content = "Hello World"
-        
-        result = WAF.analyze(response)
-        self.assertFalse(result["waf_present"])
+                result = WAF.analyze(response)
+                if source is None:
+                    self.assertFalse(result["waf_present"])
+                else:
+                    self.assertTrue(result["waf_present"])
+                    self.assertIn(source, result["source"])
 
 if __name__ == '__main__':
     unittest.main()